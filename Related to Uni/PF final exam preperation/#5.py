@@ -5,16 +5,32 @@
 # Each iteration of the inner loop will ask the user for the inches of rainfall for that month. 
 # After all iterations, the program should display the number of months, the total inches of 
 # rainfall, and the average rainfall per month for the entire period.
+#
+# Also reads a file of monthly readings (one month per value), using online_stats.py:
+#   python "#5.py" --file rainfall.txt
 
-total_years = int(input("Enter the number of years: "))
-total_months = total_years * 12
-total_rainfall = 0.0
-for year in range(1, total_years + 1):
-    print(f"Year {year}:")
-    for month in range(1, 13):
-        monthly_rainfall = float(input(f"  Enter the inches of rainfall for month {month}: "))
-        total_rainfall += monthly_rainfall
-average_rainfall = total_rainfall / total_months
-print(f"\nNumber of months: {total_months}")
-print(f"Total inches of rainfall: {total_rainfall}")
-print(f"Average rainfall per month: {average_rainfall}")
\ No newline at end of file
+import argparse
+from online_stats import RunningStats, read_stats
+
+def enter_rainfall():
+    stats = RunningStats()
+    total_years = int(input("Enter the number of years: "))
+    for year in range(1, total_years + 1):
+        print(f"Year {year}:")
+        for month in range(1, 13):
+            stats.add(float(input(f"  Enter the inches of rainfall for month {month}: ")))
+    return stats
+
+parser = argparse.ArgumentParser(description="Total and average monthly rainfall.")
+parser.add_argument("--file", help="read monthly rainfall from a file ('-' for stdin) instead of asking")
+args = parser.parse_args()
+
+stats = read_stats(args.file) if args.file else enter_rainfall()
+if not stats.count:
+    print("No rainfall data to report.")
+else:
+    print(f"\nNumber of months: {stats.count}")
+    print(f"Total inches of rainfall: {stats.total}")
+    print(f"Average rainfall per month: {stats.total / stats.count}") # Same digits as the original total / months
+    if args.file:
+        print(f"Wettest month: {stats.max} inches, driest month: {stats.min} inches")
@@ -0,0 +1,249 @@
+# Online Statistics
+# Count, mean, variance, min, max and approximate percentiles of a stream of numbers in
+# constant memory, so the lap-time and rainfall exercises work on millions of readings too.
+# Mean/variance use Welford's update (no giant sums that lose precision); percentiles come
+# from a small t-digest sketch. With NumPy installed, files are read in chunks and each
+# chunk is summarised with array operations.
+#
+#   python online_stats.py --file laps.txt
+#   some_sensor | python online_stats.py --percentiles 50,99
+
+import sys
+import math
+import argparse
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError: # The plain-Python path does the same work one value at a time
+    np = None
+
+DEFAULT_COMPRESSION = 200   # t-digest size: ~half this many centroids; rank error well under 0.1%
+DEFAULT_CHUNK_LINES = 100000
+
+def q_to_k(q, compression):
+    return compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+def k_to_q(k, compression):
+    return (math.sin(k * 2 * math.pi / compression) + 1) / 2
+
+class TDigest:
+    """Merging t-digest: sorted (mean, weight) centroids, small at the tails and bigger in the
+    middle, so extreme percentiles stay accurate while memory stays fixed.
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = []
+        self.weights = []
+        self.buffer = []
+        self.buffer_size = 5 * compression
+        self.count = 0
+
+    def add(self, value):
+        self.buffer.append(value)
+        self.count += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.compress()
+
+    def add_centroids(self, means, weights):
+        """Merges already-grouped values (e.g. from add_array) into the digest."""
+        self.compress(list(zip(means, weights)))
+        self.count += sum(weights)
+
+    def add_array(self, values):
+        """NumPy path: sorts a chunk and groups it into centroids with array operations."""
+        values = np.sort(values)
+        n = len(values)
+        if not n:
+            return
+        q = (np.arange(n) + 0.5) / n
+        k = self.compression / (2 * math.pi) * np.arcsin(2 * q - 1)
+        groups = np.floor(k - k[0]).astype(np.int64)
+        starts = np.flatnonzero(np.diff(groups, prepend=-1))
+        weights = np.diff(np.append(starts, n))
+        means = np.add.reduceat(values, starts) / weights
+        self.add_centroids(means.tolist(), weights.tolist())
+
+    def compress(self, extra=()):
+        points = list(zip(self.means, self.weights))
+        points += [(value, 1) for value in self.buffer]
+        points += extra
+        self.buffer = []
+        if not points:
+            return
+        points.sort()
+        total = sum(w for _, w in points)
+        means, weights = [], []
+        cur_mean, cur_weight = points[0]
+        done = 0
+        q_limit = k_to_q(q_to_k(0, self.compression) + 1, self.compression)
+        for mean, weight in points[1:]:
+            if (done + cur_weight + weight) / total <= q_limit:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                means.append(cur_mean)
+                weights.append(cur_weight)
+                done += cur_weight
+                q_limit = k_to_q(q_to_k(min(1.0, done / total), self.compression) + 1, self.compression)
+                cur_mean, cur_weight = mean, weight
+        means.append(cur_mean)
+        weights.append(cur_weight)
+        self.means, self.weights = means, weights
+
+    def quantile(self, q, low, high):
+        """Approximate q-quantile (0..1); `low`/`high` are the exact min and max seen."""
+        self.compress()
+        if not self.means:
+            return None
+        if len(self.means) == 1:
+            return self.means[0]
+        target = q * self.count
+        # Each centroid sits at the middle of its weight; interpolate between neighbours
+        cumulative = 0
+        prev_center, prev_mean = 0, low
+        for mean, weight in zip(self.means, self.weights):
+            center = cumulative + weight / 2
+            if target < center:
+                span = center - prev_center
+                return prev_mean + (mean - prev_mean) * ((target - prev_center) / span if span else 0)
+            prev_center, prev_mean = center, mean
+            cumulative += weight
+        span = self.count - prev_center
+        return prev_mean + (high - prev_mean) * ((target - prev_center) / span if span else 0)
+
+class RunningStats:
+    """Streaming count / total / mean / variance / min / max plus a percentile sketch."""
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0 # Sum of squared differences from the mean (Welford)
+        self.min = None
+        self.max = None
+        self.invalid = 0
+        self.digest = TDigest(compression)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self.digest.add(value)
+
+    def add_array(self, values):
+        """Adds a NumPy chunk at once, merging its mean/variance with Chan's formula."""
+        n = len(values)
+        if not n:
+            return
+        self.total += float(values.sum())
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta * delta * self.count * n / total
+        self.count = total
+        low, high = float(values.min()), float(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self.digest.add_array(values)
+
+    @property
+    def variance(self):
+        """Sample variance (n - 1), 0 for fewer than two values."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        if p <= 0:
+            return self.min
+        if p >= 100:
+            return self.max
+        return self.digest.quantile(p / 100, self.min, self.max)
+
+def iter_values(lines, stats=None):
+    """Numbers from text lines (separated by spaces or commas, '#' starts a comment).
+
+    Tokens that are not (finite) numbers are skipped and counted in stats.invalid.
+    """
+    for line in lines:
+        line = line.split('#', 1)[0]
+        for token in line.replace(',', ' ').split():
+            try:
+                value = float(token)
+            except ValueError:
+                value = math.nan
+            if math.isfinite(value):
+                yield value
+            elif stats is not None:
+                stats.invalid += 1
+
+def summarise_stream(lines, use_numpy=None, chunk_lines=DEFAULT_CHUNK_LINES, compression=DEFAULT_COMPRESSION):
+    """RunningStats over a stream of text lines, read `chunk_lines` at a time with NumPy."""
+    stats = RunningStats(compression)
+    if use_numpy is None:
+        use_numpy = np is not None
+    if not use_numpy:
+        for value in iter_values(lines, stats):
+            stats.add(value)
+        return stats
+
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, chunk_lines))
+        if not chunk:
+            return stats
+        text = " ".join(line.split('#', 1)[0] for line in chunk).replace(',', ' ')
+        try:
+            values = np.array(text.split(), dtype=float)
+        except ValueError:
+            values = np.array(list(iter_values(chunk, stats)), dtype=float) # Some junk: sort it out token by token
+        finite = np.isfinite(values)
+        if not finite.all():
+            stats.invalid += int((~finite).sum())
+            values = values[finite]
+        stats.add_array(values)
+
+def read_stats(path=None, use_numpy=None):
+    """RunningStats for a file, or stdin when `path` is None or '-'."""
+    if path in (None, '-'):
+        return summarise_stream(sys.stdin, use_numpy)
+    with open(path, 'r') as f:
+        return summarise_stream(f, use_numpy)
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming statistics for a list of numbers.")
+    parser.add_argument("--file", help="read numbers from this file instead of stdin")
+    parser.add_argument("--percentiles", default="50,90,95,99", help="comma-separated percentiles to show")
+    parser.add_argument("--no-numpy", action="store_true", help="use the plain-Python path")
+    args = parser.parse_args()
+
+    stats = read_stats(args.file, use_numpy=False if args.no_numpy else None)
+    if not stats.count:
+        print("No numbers found.")
+        return
+    print(f"Count:   {stats.count}")
+    print(f"Mean:    {stats.mean}")
+    print(f"Std dev: {stats.stdev}")
+    print(f"Min:     {stats.min}")
+    print(f"Max:     {stats.max}")
+    for p in args.percentiles.split(','):
+        print(f"p{p.strip()}:{' ' * max(1, 6 - len(p.strip()))}{stats.percentile(float(p))}")
+    if stats.invalid:
+        print(f"Skipped {stats.invalid} value(s) that were not numbers.")
+
+if __name__ == "__main__":
+    main()
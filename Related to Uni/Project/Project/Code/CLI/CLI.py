@@ -1,32 +1,18 @@
 import os
-import pyttsx3
-import json
+import sys
 from datetime import datetime
 
-DB_FILE = "finance_data.json"
+# The shared storage layer lives in Code/finance
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from finance import open_storage, expense_name, create_speaker
+
+speaker = create_speaker()
 
 def speak(text):
     print(f"🎙️ AI: {text}")
-    try:
-        engine = pyttsx3.init()
-        engine.setProperty('rate', 150)
-        engine.say(text)
-        engine.runAndWait()
-        engine.stop()
-    except Exception as e:
-        print(f"Sound Error: {e}")
-
-def load_data():
-    if os.path.exists(DB_FILE):
-        with open(DB_FILE, "r") as f:
-            return json.load(f)
-    return {"users": {"admin": {"password": "123", "expenses": []}}}
-
-def save_data(data):
-    with open(DB_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+    speaker.say(text) # Queued for the speech thread; returns immediately
 
-data = load_data()
+storage = open_storage()
 current_user = None
 
 def clear_screen():
@@ -41,7 +27,8 @@ def auth_menu():
         choice = input("\nChoose: ")
         if choice == '1':
             u, p = input("Username: "), input("Password: ")
-            if u in data["users"] and data["users"][u]["password"] == p:
+            user = storage.get_user(u)
+            if user and user["password"] == p:
                 current_user = u
                 speak(f"Access granted. Welcome {u}.")
                 main_dashboard()
@@ -53,12 +40,10 @@ def auth_menu():
             if not new_u or not new_p:
                 speak("Username/Password cannot be empty.")
                 input("Press Enter...")
-            elif new_u in data["users"]: 
+            elif not storage.add_user(new_u, new_p): 
                 speak("User already exists.")
                 input("Press Enter...")
             else:
-                data["users"][new_u] = {"password": new_p, "expenses": []}
-                save_data(data)
                 speak("Account created!")
                 input("Press Enter to continue...")
         elif choice == '3': break
@@ -68,12 +53,7 @@ def add_expense():
     item = input("Item Name: ")
     try:
         cost = float(input("Amount (Rs.): "))
-        exps = data["users"][current_user]["expenses"]
-        # Generate ID based on Max ID + 1 to avoid duplicates
-        new_id = max([e["id"] for e in exps], default=0) + 1
-        entry = {"id": new_id, "item": item, "cost": cost, "date": datetime.now().strftime("%Y-%m-%d")}
-        data["users"][current_user]["expenses"].append(entry)
-        save_data(data)
+        storage.add_expense(current_user, item, cost, datetime.now().strftime("%Y-%m-%d"))
         speak("Recorded.")
     except ValueError: 
         speak("Invalid number.")
@@ -83,15 +63,14 @@ def update_expense():
     view_history(pause=False)
     try:
         target = int(input("\nEnter ID to update: "))
-        for e in data["users"][current_user]["expenses"]:
-            if e["id"] == target:
-                e["item"] = input(f"New name ({e.get('item', e.get('name'))}): ") or e.get('item', e.get('name'))
-                new_cost = input(f"New cost ({e['cost']}): ")
-                if new_cost: # Only try to convert if user typed something
-                    e["cost"] = float(new_cost)
-                save_data(data)
-                speak("Updated successfully.")
-                return
+        e = storage.get_expense(current_user, target)
+        if e:
+            new_item = input(f"New name ({expense_name(e)}): ") or expense_name(e)
+            new_cost = input(f"New cost ({e['cost']}): ")
+            # Only try to convert if user typed something
+            storage.update_expense(current_user, target, new_item, float(new_cost) if new_cost else None)
+            speak("Updated successfully.")
+            return
         speak("ID not found.")
         input("Press Enter...")
     except ValueError: 
@@ -102,10 +81,7 @@ def delete_expense():
     view_history(pause=False)
     try:
         target = int(input("\nEnter ID to delete: "))
-        orig_len = len(data["users"][current_user]["expenses"])
-        data["users"][current_user]["expenses"] = [e for e in data["users"][current_user]["expenses"] if e["id"] != target]
-        if len(data["users"][current_user]["expenses"]) < orig_len:
-            save_data(data)
+        if storage.delete_expenses(current_user, [target]):
             speak("Deleted.")
         else: 
             speak("ID not found.")
@@ -116,29 +92,66 @@ def delete_expense():
 
 def view_history(pause=True):
     clear_screen()
-    exps = data["users"][current_user]["expenses"]
+    exps = storage.list_expenses(current_user)
     if not exps: 
         speak("History is empty.")
     else:
         print(f"{'ID':<4} | {'Item':<15} | {'Cost':<10}")
         print("-" * 35)
         for e in exps: 
-            name = e.get('item') or e.get('name') # Compatibility with GUI keys
+            name = expense_name(e) # Compatibility with GUI keys
             print(f"{e['id']:<4} | {name:<15} | Rs.{e['cost']:,.2f}")
     if pause: input("\nPress Enter to return...")
 
+def reports():
+    clear_screen()
+    print("=== REPORTS ===")
+    print("Dates as 2026, 2026-03 or 2026-03-15.")
+    start = input(f"From (Enter = start of {datetime.now().year}, '-' = all time): ").strip()
+    start = None if start == '-' else start or str(datetime.now().year)
+    end = input("To (Enter = today): ").strip() or None
+    print("\n1. By Day\n2. By Month\n3. By Item\n4. Top Expenses")
+    choice = input("\nChoose: ")
+    try:
+        if choice in ('1', '2', '3'):
+            group_by = {'1': 'day', '2': 'month', '3': 'item'}[choice]
+            rows = storage.summarise_expenses(current_user, group_by, start, end)
+            print(f"\n{group_by.title():<15} | {'Total':>14} | {'Count':>5} | {'Average':>12}")
+            print("-" * 56)
+            for key, total, count, avg in rows:
+                print(f"{key[:15]:<15} | Rs.{total:>11,.2f} | {count:>5} | Rs.{avg:>9,.2f}")
+        elif choice == '4':
+            n = int(input("How many? (10): ") or 10)
+            rows = storage.top_expenses(current_user, n, start, end)
+            print(f"\n{'ID':<6} | {'Date':<10} | {'Item':<15} | {'Cost':<10}")
+            print("-" * 50)
+            for e in rows:
+                print(f"{e['id']:<6} | {e.get('date', '-'):<10} | {expense_name(e) or '':<15} | Rs.{e['cost']:,.2f}")
+        else:
+            return
+        if not rows:
+            speak("No expenses in that period.")
+    except ValueError as e:
+        speak(f"Invalid input. {e}")
+    input("\nPress Enter to return...")
+
 def main_dashboard():
     while True:
         clear_screen()
-        total = sum(e["cost"] for e in data["users"][current_user]["expenses"])
+        total = storage.get_total(current_user)
         print(f"=== {current_user.upper()}'S DASHBOARD ===\n💰 TOTAL: Rs.{total:,.2f}\n" + "-"*25)
-        print("1. Add\n2. View\n3. Update\n4. Delete\n5. Logout")
+        print("1. Add\n2. View\n3. Update\n4. Delete\n5. Reports\n6. Logout")
         choice = input("\nChoose: ")
         if choice == '1': add_expense()
         elif choice == '2': view_history()
         elif choice == '3': update_expense()
         elif choice == '4': delete_expense()
-        elif choice == '5': break
+        elif choice == '5': reports()
+        elif choice == '6': break
 
 if __name__ == "__main__":
-    auth_menu()
\ No newline at end of file
+    try:
+        auth_menu()
+    finally:
+        speaker.close()
+        storage.close()
\ No newline at end of file
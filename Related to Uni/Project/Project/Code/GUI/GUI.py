@@ -1,9 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json, os
+import os, sys
+from datetime import date
 
-# Using the same database file as the CLI version for consistency
-DB_FILE = "finance_data.json"
+# Using the same storage layer (and database file) as the CLI version for consistency
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from finance import open_storage, expense_name, PersistenceWorker, GROUP_BY
+from virtual_table import VirtualExpenseTable
 
 class FinanceMaster:
     def __init__(self, root):
@@ -12,22 +15,25 @@ class FinanceMaster:
         self.root.geometry("1000x650")
         self.root.configure(bg="#2c3e50")
 
-        self.db = self.load_db()
+        # Handlers only change the data in memory; the worker saves in the background
+        self.storage = open_storage(autosave=False)
+        self.saver = PersistenceWorker(self.storage)
+        self.save_status = tk.StringVar(value="All changes saved")
         self.current_user = None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.show_login_screen()
+        self.poll_save_status()
 
-    def load_db(self):
-        if os.path.exists(DB_FILE):
-            with open(DB_FILE, "r") as f: 
-                data = json.load(f)
-                # Handle both CLI and GUI structure formats
-                return data.get("users", data)
-        return {"admin": {"password": "123", "expenses": []}}
+    def poll_save_status(self):
+        # Status comes from the worker thread through a queue; Tk widgets are only touched here
+        while not self.saver.status.empty():
+            self.save_status.set(self.saver.status.get_nowait())
+        self.root.after(200, self.poll_save_status)
 
-    def save_db(self):
-        # Save in the structured format required by the project
-        with open(DB_FILE, "w") as f: 
-            json.dump({"users": self.db}, f, indent=4)
+    def on_close(self):
+        self.saver.close()
+        self.storage.close()
+        self.root.destroy()
 
     def show_login_screen(self):
         self.clear_window()
@@ -46,7 +52,8 @@ class FinanceMaster:
 
     def handle_login(self):
         u, p = self.u_ent.get(), self.p_ent.get()
-        if u in self.db and self.db[u]["password"] == p:
+        user = self.storage.get_user(u)
+        if user and user["password"] == p:
             self.current_user = u
             self.show_main_dashboard()
         else: messagebox.showerror("Error", "Invalid credentials!")
@@ -56,12 +63,10 @@ class FinanceMaster:
         if not u or not p:
             messagebox.showwarning("Warning", "Fields cannot be empty")
             return
-        if u in self.db:
+        if not self.storage.add_user(u, p):
             messagebox.showerror("Error", "User already exists!")
             return
         
-        self.db[u] = {"password": p, "expenses": []}
-        self.save_db()
         messagebox.showinfo("Success", f"Account for {u} created successfully!")
 
     def show_main_dashboard(self):
@@ -81,13 +86,21 @@ class FinanceMaster:
         tk.Button(sidebar, text="Add Expense", command=self.add_rec, bg="#2ecc71").pack(fill="x", pady=2)
         tk.Button(sidebar, text="Update Selected", command=self.upd_rec, bg="#3498db").pack(fill="x", pady=2)
         tk.Button(sidebar, text="Delete Selected", command=self.del_rec, bg="#e67e22").pack(fill="x", pady=2)
+        tk.Button(sidebar, text="Reports", command=self.show_reports, bg="#9b59b6", fg="white").pack(fill="x", pady=2)
         tk.Button(sidebar, text="Logout", command=self.show_login_screen).pack(fill="x", pady=20)
+        tk.Label(sidebar, textvariable=self.save_status, bg="#ecf0f1", fg="#7f8c8d").pack(side="bottom", fill="x")
 
         self.bal_lbl = tk.Label(content, text="Total: Rs.0.00", font=("Arial", 20), bg="white")
         self.bal_lbl.pack(pady=10)
 
+        scroll = ttk.Scrollbar(content, orient="vertical")
+        scroll.pack(side="right", fill="y")
         self.tree = ttk.Treeview(content, columns=("ID", "Name", "Cost"), show="headings")
-        self.tree.heading("ID", text="ID"); self.tree.heading("Name", text="Item"); self.tree.heading("Cost", text="Rs.")
+        scroll.configure(command=self.tree.yview)
+        self.table = VirtualExpenseTable(self.tree, scroll)
+        # Clicking a heading sorts through the table's column index, not the widget contents
+        for column, title in (("ID", "ID"), ("Name", "Item"), ("Cost", "Rs.")):
+            self.tree.heading(column, text=title, command=lambda c=column: self.table.sort_by(c))
         self.tree.pack(expand=True, fill="both")
         self.refresh_table()
 
@@ -100,26 +113,21 @@ class FinanceMaster:
                 return
             
             cost = float(cost_str)
-            exps = self.db[self.current_user]["expenses"]
-            # Correct ID generation to avoid duplicates
-            new_id = max([e["id"] for e in exps], default=0) + 1
-            
-            self.db[self.current_user]["expenses"].append({"id": new_id, "name": name, "cost": cost})
-            self.save_db()
+            entry = self.storage.add_expense(self.current_user, name, cost, date.today().isoformat())
             self.e_name.delete(0, tk.END)
             self.e_amt.delete(0, tk.END)
-            self.refresh_table()
+            self.table.row_added(self.table.make_row(entry, expense_name(entry)))
+            self.refresh_total()
         except ValueError: 
             messagebox.showerror("Error", "Please enter a valid numeric amount")
 
     def del_rec(self):
         sel = self.tree.selection()
         if not sel: return
-        for s in sel:
-            idx = int(self.tree.item(s, "values")[0])
-            self.db[self.current_user]["expenses"] = [e for e in self.db[self.current_user]["expenses"] if e["id"] != idx]
-        self.save_db()
-        self.refresh_table()
+        ids = [int(s) for s in sel]
+        self.storage.delete_expenses(self.current_user, ids)
+        self.table.rows_deleted(ids)
+        self.refresh_total()
 
     def upd_rec(self):
         sel = self.tree.selection()
@@ -127,25 +135,70 @@ class FinanceMaster:
             messagebox.showinfo("Update", "Please select a row to update")
             return
         try:
-            idx = int(self.tree.item(sel[0], "values")[0])
-            for e in self.db[self.current_user]["expenses"]:
-                if e["id"] == idx:
-                    e["name"] = self.e_name.get() or e.get("name") or e.get("item")
-                    new_val = self.e_amt.get()
-                    if new_val: e["cost"] = float(new_val)
-            self.save_db()
-            self.refresh_table()
+            idx = int(sel[0])
+            new_val = self.e_amt.get()
+            self.storage.update_expense(self.current_user, idx, self.e_name.get() or None,
+                                        float(new_val) if new_val else None)
+            entry = self.storage.get_expense(self.current_user, idx)
+            if entry:
+                self.table.row_updated(self.table.make_row(entry, expense_name(entry)))
+            self.refresh_total()
         except ValueError: 
             messagebox.showerror("Error", "Invalid amount format")
 
+    def show_reports(self):
+        win = tk.Toplevel(self.root)
+        win.title("Reports")
+        win.geometry("560x450")
+        controls = tk.Frame(win, padx=10, pady=10)
+        controls.pack(fill="x")
+
+        tk.Label(controls, text="From:").grid(row=0, column=0)
+        start = tk.Entry(controls, width=11); start.grid(row=0, column=1, padx=5)
+        start.insert(0, str(date.today().year)) # Year to date
+        tk.Label(controls, text="To:").grid(row=0, column=2)
+        end = tk.Entry(controls, width=11); end.grid(row=0, column=3, padx=5)
+        mode = ttk.Combobox(controls, values=[f"By {g}" for g in GROUP_BY] + ["Top 20"], state="readonly", width=10)
+        mode.current(1)
+        mode.grid(row=0, column=4, padx=5)
+
+        result = ttk.Treeview(win, columns=("A", "B", "C", "D"), show="headings")
+        result.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+        def run():
+            # Bounds are 2026, 2026-03 or 2026-03-15; blank means no limit
+            first, last = start.get().strip() or None, end.get().strip() or None
+            try:
+                if mode.get() == "Top 20":
+                    headings = ("ID", "Date", "Item", "Rs.")
+                    rows = [(e["id"], e.get("date", "-"), expense_name(e), f"{e['cost']:,.2f}")
+                            for e in self.storage.top_expenses(self.current_user, 20, first, last)]
+                else:
+                    group_by = mode.get().split()[-1]
+                    headings = (group_by.title(), "Total", "Count", "Average")
+                    rows = [(key, f"{total:,.2f}", count, f"{avg:,.2f}") for key, total, count, avg
+                            in self.storage.summarise_expenses(self.current_user, group_by, first, last)]
+            except ValueError as e:
+                messagebox.showerror("Error", str(e), parent=win)
+                return
+            for column, title in zip(("A", "B", "C", "D"), headings):
+                result.heading(column, text=title)
+            result.delete(*result.get_children())
+            for row in rows:
+                result.insert("", "end", values=row)
+
+        tk.Button(controls, text="Run", command=run, bg="#2ecc71").grid(row=0, column=5, padx=5)
+        run()
+
     def refresh_table(self):
-        for i in self.tree.get_children(): self.tree.delete(i)
-        total = 0
-        for e in self.db[self.current_user]["expenses"]:
-            # Support both 'name' and 'item' keys for CLI compatibility
-            name = e.get("name") or e.get("item")
-            self.tree.insert("", "end", values=(e["id"], name, f"{e['cost']:.2f}"))
-            total += e["cost"]
+        # Full reload (on login); edits afterwards are applied to the table row by row
+        rows = [self.table.make_row(e, expense_name(e)) # Support both 'name' and 'item' keys for CLI compatibility
+                for e in self.storage.list_expenses(self.current_user)]
+        self.table.load(rows)
+        self.refresh_total()
+
+    def refresh_total(self):
+        total = self.storage.get_total(self.current_user)
         self.bal_lbl.config(text=f"Total: Rs.{total:,.2f}")
 
     def clear_window(self):
@@ -0,0 +1,158 @@
+from bisect import bisect_left, insort
+
+# Virtualised expense table for the Tkinter GUI. Instead of deleting every Treeview row
+# and re-inserting the whole history after each change, only the first pages of the
+# current sort order are in the widget (more are fetched as the user scrolls down), and
+# add/update/delete touch just the affected row.
+
+PAGE_SIZE = 200          # Rows fetched into the Treeview at a time
+LOAD_MORE_AT = 0.9       # Fetch the next page once the view is scrolled past this fraction
+
+COLUMN_KEYS = {
+    "ID": lambda row: row[0],
+    "Name": lambda row: (row[1] or "").lower(),
+    "Cost": lambda row: row[2],
+}
+
+class SortedColumnIndex:
+    """(sort key, expense id) pairs kept sorted with bisect, so a sort order survives edits."""
+
+    def __init__(self, key, rows):
+        self.key = key
+        self.entries = sorted((key(row), row[0]) for row in rows)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, row):
+        entry = (self.key(row), row[0])
+        insort(self.entries, entry)
+        return bisect_left(self.entries, entry)
+
+    def remove(self, row):
+        pos = bisect_left(self.entries, (self.key(row), row[0]))
+        del self.entries[pos]
+
+    def position(self, row):
+        return bisect_left(self.entries, (self.key(row), row[0]))
+
+    def ids(self, start, end, descending=False):
+        """Expense IDs at display positions [start, end)."""
+        if descending:
+            n = len(self.entries)
+            return [entry[1] for entry in reversed(self.entries[max(0, n - end):n - start])]
+        return [entry[1] for entry in self.entries[start:end]]
+
+class VirtualExpenseTable:
+    """Feeds a ttk.Treeview (columns ID, Name, Cost) page by page from an in-memory row map."""
+
+    def __init__(self, tree, scrollbar=None, page_size=PAGE_SIZE):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.page_size = page_size
+        self.rows = {}           # expense id -> (id, name, cost)
+        self.indexes = {}        # column -> SortedColumnIndex, built on first sort by that column
+        self.sort_column = "ID"
+        self.descending = False
+        self.loaded = 0          # How many rows of the current order are in the Treeview
+        tree.configure(yscrollcommand=self.on_yscroll)
+
+    @staticmethod
+    def make_row(entry, name):
+        return (entry["id"], name, entry["cost"])
+
+    def index(self):
+        column = self.sort_column
+        if column not in self.indexes:
+            self.indexes[column] = SortedColumnIndex(COLUMN_KEYS[column], self.rows.values())
+        return self.indexes[column]
+
+    def display_position(self, row):
+        pos = self.index().position(row)
+        return len(self.rows) - 1 - pos if self.descending else pos
+
+    def values(self, row):
+        return (row[0], row[1], f"{row[2]:.2f}")
+
+    def load(self, rows):
+        """Replaces the whole table (e.g. after login) and shows the first page."""
+        self.rows = {row[0]: row for row in rows}
+        self.indexes = {}
+        self.reset_view()
+
+    def reset_view(self):
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        self.loaded = 0
+        self.load_more()
+
+    def load_more(self):
+        if self.loaded >= len(self.rows):
+            return
+        end = min(self.loaded + self.page_size, len(self.rows))
+        for expense_id in self.index().ids(self.loaded, end, self.descending):
+            self.tree.insert("", "end", iid=str(expense_id), values=self.values(self.rows[expense_id]))
+        self.loaded = end
+
+    def on_yscroll(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        if float(last) >= LOAD_MORE_AT:
+            self.load_more()
+
+    def sort_by(self, column):
+        """Heading click: sort by `column`, toggling the direction when it is already the sort column."""
+        if column == self.sort_column:
+            self.descending = not self.descending
+        else:
+            self.sort_column, self.descending = column, False
+        self.reset_view()
+
+    def row_added(self, row):
+        self.rows[row[0]] = row
+        for index in self.indexes.values():
+            index.add(row)
+        pos = self.display_position(row)
+        # Rows beyond the loaded prefix will arrive with a later page
+        if pos <= self.loaded:
+            self.tree.insert("", pos, iid=str(row[0]), values=self.values(row))
+            self.loaded += 1
+
+    def row_updated(self, row):
+        old = self.rows.get(row[0])
+        if old is None:
+            return self.row_added(row)
+        for index in self.indexes.values():
+            index.remove(old)
+            index.add(row)
+        self.rows[row[0]] = row
+
+        iid = str(row[0])
+        pos = self.display_position(row)
+        if self.tree.exists(iid):
+            if pos < self.loaded:
+                self.tree.item(iid, values=self.values(row))
+                self.tree.move(iid, "", pos)
+            else:
+                self.tree.delete(iid)
+                self.loaded -= 1
+        elif pos < self.loaded:
+            self.tree.insert("", pos, iid=iid, values=self.values(row))
+            self.loaded += 1
+
+    def rows_deleted(self, expense_ids):
+        visible = []
+        for expense_id in expense_ids:
+            row = self.rows.pop(expense_id, None)
+            if row is None:
+                continue
+            for index in self.indexes.values():
+                index.remove(row)
+            if self.tree.exists(str(expense_id)):
+                visible.append(str(expense_id))
+        if visible:
+            self.tree.delete(*visible)
+            self.loaded -= len(visible)
+        if self.loaded < self.page_size:
+            self.load_more()
@@ -0,0 +1,7 @@
+from .storage import DB_FILE, SQLITE_FILE, JsonStorage, SqliteStorage, open_storage, expense_name
+from .speech import NullSpeech, SpeechWorker, create_speaker
+from .expense_index import ExpenseIndex, DateIndex
+from .query import GROUP_BY, date_bounds
+from .aggregates import SpendingAggregates, build_aggregates
+from .persistence import PersistenceWorker
+from .sharded import ShardedStorage
@@ -0,0 +1,68 @@
+# Running spending totals per user (overall, per day, per month), kept up to date on every
+# add/update/delete so the dashboards never have to re-sum a whole history.
+
+TOLERANCE = 0.005 # Float drift allowed by the consistency checker (half a paisa)
+
+class SpendingAggregates:
+    """Total, count and per-day / per-month sums for one user.
+
+    Undated expenses (older GUI entries) only count towards the total.
+    """
+
+    def __init__(self, total=0.0, count=0, by_day=None, by_month=None):
+        self.total = total
+        self.count = count
+        self.by_day = by_day or {}
+        self.by_month = by_month or {}
+
+    def apply(self, entry, sign):
+        cost = sign * entry["cost"]
+        self.total += cost
+        self.count += sign
+        date = entry.get("date")
+        if date:
+            for bucket, key in ((self.by_day, date), (self.by_month, date[:7])):
+                value = bucket.get(key, 0.0) + cost
+                if abs(value) < 1e-9 and sign < 0:
+                    bucket.pop(key, None)
+                else:
+                    bucket[key] = value
+
+    def add(self, entry):
+        self.apply(entry, 1)
+
+    def remove(self, entry):
+        self.apply(entry, -1)
+
+    def periods(self):
+        """(period, amount) pairs as stored by SQLite: 'total', 'count', then each day and month."""
+        return ([("total", self.total), ("count", self.count)]
+                + list(self.by_day.items()) + list(self.by_month.items()))
+
+    def to_dict(self):
+        return {"total": self.total, "count": self.count, "by_day": dict(self.by_day), "by_month": dict(self.by_month)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("total", 0.0), data.get("count", 0), dict(data.get("by_day", {})),
+                   dict(data.get("by_month", {})))
+
+def build_aggregates(expenses):
+    """Recomputes the aggregates from scratch."""
+    aggregates = SpendingAggregates()
+    for e in expenses:
+        aggregates.add(e)
+    return aggregates
+
+def compare_aggregates(stored, expected, tolerance=TOLERANCE):
+    """Lists human-readable differences between two SpendingAggregates (empty when consistent)."""
+    problems = []
+    if abs(stored.total - expected.total) > tolerance:
+        problems.append(f"total is {stored.total:.2f}, expected {expected.total:.2f}")
+    if stored.count != expected.count:
+        problems.append(f"count is {stored.count}, expected {expected.count}")
+    for label, have, want in (("day", stored.by_day, expected.by_day), ("month", stored.by_month, expected.by_month)):
+        for key in sorted(set(have) | set(want)):
+            if abs(have.get(key, 0.0) - want.get(key, 0.0)) > tolerance:
+                problems.append(f"{label} {key} is {have.get(key, 0.0):.2f}, expected {want.get(key, 0.0):.2f}")
+    return problems
@@ -0,0 +1,250 @@
+import os
+import re
+import sys
+import csv
+import json
+import time
+import argparse
+import datetime
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError: # Cost parsing falls back to plain float() per row
+    np = None
+
+from .storage import open_storage, expense_name
+
+# Bulk import/export of expenses as CSV or JSON lines, e.g. a bank export:
+#   python -m finance.bulk import --user admin statement.csv
+#   python -m finance.bulk export --user admin --format jsonl expenses.jsonl
+#   python -m finance.bulk import --user admin --negative-debits bank.csv
+#
+# Amounts are expenses as written, and negative ones are rejected. Bank exports that show
+# money going out as negative amounts need --negative-debits: negatives are then imported
+# as expenses and positive rows (salary, refunds...) are skipped as credits.
+#
+# Files are streamed in fixed-size batches: each batch is parsed and validated in one go,
+# gets a single block of IDs and is written with one storage call, so memory stays
+# bounded by the batch size and a million rows means ~100 writes, not a million saves.
+# (The JSON backends keep everything in memory anyway; SQLite is the one for big imports.)
+
+BATCH_SIZE = 10000
+REJECTS_KEPT = 20      # Rejected lines kept for the report; the rest are only counted
+DATE_CACHE_SIZE = 10000 # Distinct date strings remembered before the cache starts over
+
+ITEM_COLUMNS = ("item", "name", "description", "details")
+COST_COLUMNS = ("cost", "amount", "debit")
+DATE_COLUMNS = ("date", "transaction date", "posted")
+
+ISO_DATE = re.compile(r'(\d{4})-(\d{2})-(\d{2})(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?')
+DMY_DATE = re.compile(r'(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})')
+
+def detect_format(path):
+    return "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+
+def find_column(header, names):
+    lowered = [h.strip().lower() for h in header]
+    for name in names:
+        if name in lowered:
+            return lowered.index(name)
+    return None
+
+def read_csv_batches(f, batch_size=BATCH_SIZE):
+    """Yields lists of (line number, item, cost text, date text, problem) from a CSV file with a
+    header row; `problem` is None, or why the line can't be read at all."""
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    item_col, cost_col, date_col = (find_column(header, names) for names in (ITEM_COLUMNS, COST_COLUMNS, DATE_COLUMNS))
+    if item_col is None or cost_col is None:
+        raise ValueError(f"CSV header needs an item and a cost column, got {header}")
+    width = max(c for c in (item_col, cost_col, date_col) if c is not None) + 1
+    while True:
+        rows = list(islice(reader, batch_size))
+        if not rows:
+            return
+        first_line = reader.line_num - len(rows) + 1
+        yield [
+            (first_line + n, row[item_col], row[cost_col], row[date_col] if date_col is not None else "", None)
+            if len(row) >= width else (first_line + n, "", "", "", f"only {len(row)} column(s)")
+            for n, row in enumerate(rows)
+        ]
+
+def read_jsonl_batches(f, batch_size=BATCH_SIZE):
+    """Same as read_csv_batches for one JSON object per line ({"item", "cost", "date"})."""
+    line_no = 0
+    while True:
+        lines = list(islice(f, batch_size))
+        if not lines:
+            return
+        batch = []
+        for line in lines:
+            line_no += 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                batch.append((line_no, "", "", "", "not valid JSON"))
+                continue
+            if not isinstance(record, dict):
+                batch.append((line_no, "", "", "", f"not a JSON object ({type(record).__name__})"))
+                continue
+            batch.append((line_no, expense_name(record) or record.get("description") or "",
+                          str(record.get("cost", record.get("amount", ""))), str(record.get("date") or ""), None))
+        yield batch
+
+def parse_costs(texts):
+    """Parses a batch of amount strings; invalid ones become None."""
+    if np is not None:
+        try:
+            values = np.array(texts, dtype=float)
+            ok = np.isfinite(values)
+            return [float(v) if good else None for v, good in zip(values.tolist(), ok.tolist())]
+        except ValueError:
+            pass # Some row has thousands separators or junk: sort it out row by row
+    costs = []
+    for text in texts:
+        try:
+            value = float(text.replace(",", "").strip())
+        except (ValueError, AttributeError):
+            value = None
+        costs.append(value if value is not None and value == value and abs(value) != float("inf") else None)
+    return costs
+
+def parse_dates(texts, cache):
+    """Normalises a batch of dates to YYYY-MM-DD ('' stays undated, invalid becomes None).
+
+    Statements repeat the same few dates thousands of times, so each distinct string is
+    parsed once and remembered in `cache`.
+    """
+    dates = []
+    for text in texts:
+        if text not in cache:
+            if len(cache) >= DATE_CACHE_SIZE:
+                cache.clear() # A file full of distinct junk must not grow it forever
+            cache[text] = normalise_date(text)
+        dates.append(cache[text])
+    return dates
+
+def normalise_date(text):
+    text = text.strip()
+    if not text:
+        return ""
+    m = ISO_DATE.fullmatch(text) # The whole field: a time of day may follow, anything else is junk
+    if m:
+        year, month, day = m.groups()
+    else:
+        m = DMY_DATE.fullmatch(text)
+        if not m:
+            return None
+        day, month, year = m.groups()
+    try:
+        return datetime.date(int(year), int(month), int(day)).isoformat() # Rejects 2026-02-31 and the like
+    except ValueError:
+        return None
+
+def validate_batch(batch, date_cache, negative_debits=False):
+    """Splits a raw batch into storage rows (item, cost, date) and (line number, reason) rejects.
+
+    With `negative_debits`, negative amounts are the expenses and positive ones are credits to skip.
+    """
+    costs = parse_costs([row[2] for row in batch])
+    dates = parse_dates([row[3] for row in batch], date_cache)
+    rows, rejects = [], []
+    for (line_no, item, cost_text, date_text, problem), cost, date in zip(batch, costs, dates):
+        item = item.strip()
+        if problem:
+            rejects.append((line_no, problem))
+        elif not item:
+            rejects.append((line_no, "missing item"))
+        elif cost is None:
+            rejects.append((line_no, f"bad amount {cost_text!r}"))
+        elif date is None:
+            rejects.append((line_no, f"bad date {date_text!r}"))
+        elif negative_debits and cost > 0:
+            rejects.append((line_no, f"credit {cost_text.strip()}, not an expense"))
+        elif not negative_debits and cost < 0:
+            rejects.append((line_no, f"negative amount {cost_text.strip()} (bank export? use --negative-debits)"))
+        else:
+            rows.append((item, -cost if negative_debits else cost, date or None))
+    return rows, rejects
+
+def import_expenses(storage, username, path, fmt=None, batch_size=BATCH_SIZE, negative_debits=False):
+    """Streams `path` into the user's expenses.
+
+    Returns (imported count, skipped count, the first REJECTS_KEPT (line number, reason) rejects).
+    """
+    reader = read_jsonl_batches if (fmt or detect_format(path)) == "jsonl" else read_csv_batches
+    imported, skipped, rejects, date_cache = 0, 0, [], {}
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        for batch in reader(f, batch_size):
+            rows, bad = validate_batch(batch, date_cache, negative_debits)
+            skipped += len(bad)
+            rejects += bad[:REJECTS_KEPT - len(rejects)]
+            if rows:
+                storage.add_expenses_bulk(username, rows)
+                imported += len(rows)
+    return imported, skipped, rejects
+
+def export_expenses(storage, username, path, fmt=None, batch_size=BATCH_SIZE):
+    """Writes the user's expenses to `path` batch by batch. Returns how many were written."""
+    fmt = fmt or detect_format(path)
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = None
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(["id", "item", "cost", "date"])
+        for batch in storage.iter_expenses(username, batch_size):
+            if writer is not None:
+                writer.writerows((e["id"], expense_name(e), e["cost"], e.get("date") or "") for e in batch)
+            else:
+                f.write("".join(json.dumps({"id": e["id"], "item": expense_name(e), "cost": e["cost"],
+                                            "date": e.get("date")}) + "\n" for e in batch))
+            written += len(batch)
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import/export of expenses as CSV or JSON lines.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("path", help="CSV (.csv) or JSON-lines (.jsonl) file")
+    parser.add_argument("--user", required=True, help="account to import into / export from")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="file format (default: from the extension)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"rows per batch (default {BATCH_SIZE})")
+    parser.add_argument("--negative-debits", action="store_true",
+                        help="amounts going out are negative (bank exports); positive rows are skipped as credits")
+    parser.add_argument("--backend", help="storage backend (default: same choice as the CLI/GUI)")
+    args = parser.parse_args()
+
+    if args.action == "import" and not os.path.exists(args.path):
+        print(f"❌ Could not find '{args.path}'.")
+        sys.exit(1)
+
+    # JSON file backend: save once at the end instead of rewriting the whole file per batch
+    storage = open_storage(args.backend, autosave=False)
+    try:
+        if storage.get_user(args.user) is None:
+            print(f"❌ No account called '{args.user}'.")
+            sys.exit(1)
+        start = time.perf_counter()
+        if args.action == "import":
+            imported, skipped, rejects = import_expenses(storage, args.user, args.path, args.format,
+                                                         args.batch_size, args.negative_debits)
+            storage.save()
+            for line_no, reason in rejects:
+                print(f"[!] line {line_no}: {reason}")
+            if skipped > len(rejects):
+                print(f"[!] ... and {skipped - len(rejects)} more")
+            print(f"✅ Imported {imported} expenses for {args.user}, skipped {skipped} "
+                  f"({time.perf_counter() - start:.1f}s).")
+        else:
+            written = export_expenses(storage, args.user, args.path, args.format, args.batch_size)
+            print(f"✅ Exported {written} expenses to '{args.path}' ({time.perf_counter() - start:.1f}s).")
+    finally:
+        storage.close()
+
+if __name__ == "__main__":
+    main()
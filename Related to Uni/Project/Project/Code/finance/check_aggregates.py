@@ -0,0 +1,36 @@
+import sys
+import argparse
+
+from .storage import open_storage
+
+# Consistency checker for the stored spending aggregates. Run from the data folder:
+#   python -m finance.check_aggregates [--fix]
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the stored spending aggregates against the expenses.")
+    parser.add_argument("--fix", action="store_true", help="rebuild the aggregates of users that are out of sync")
+    parser.add_argument("--backend", help="storage backend (default: same choice as the CLI/GUI)")
+    args = parser.parse_args()
+
+    storage = open_storage(args.backend)
+    broken = 0
+    try:
+        for username in storage.user_names():
+            problems = storage.check_aggregates(username)
+            if not problems:
+                continue
+            broken += 1
+            print(f"[!] {username}: " + "; ".join(problems[:5]))
+            if args.fix:
+                storage.rebuild_aggregates(username)
+                print(f"    rebuilt aggregates for {username}")
+    finally:
+        storage.close()
+
+    if broken and not args.fix:
+        print(f"❌ {broken} user(s) have inconsistent aggregates (run with --fix to rebuild).")
+        sys.exit(1)
+    print("✅ Aggregates are consistent." if not broken else f"✅ Rebuilt aggregates for {broken} user(s).")
+
+if __name__ == "__main__":
+    main()
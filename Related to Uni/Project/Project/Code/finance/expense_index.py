@@ -0,0 +1,83 @@
+from bisect import bisect_left, insort
+
+def expense_name(expense):
+    """The CLI stores the item under 'item', older GUI entries under 'name'."""
+    return expense.get('item') or expense.get('name')
+
+class DateIndex:
+    """(date, id) pairs of the dated expenses, kept sorted so date ranges are two bisects."""
+
+    def __init__(self, expenses=()):
+        self.keys = sorted((e["date"], e["id"]) for e in expenses if e.get("date"))
+
+    def add(self, entry):
+        if entry.get("date"):
+            insort(self.keys, (entry["date"], entry["id"]))
+
+    def remove(self, entry):
+        if entry.get("date"):
+            key = (entry["date"], entry["id"])
+            pos = bisect_left(self.keys, key)
+            if pos < len(self.keys) and self.keys[pos] == key:
+                del self.keys[pos]
+
+    def ids_between(self, low, high):
+        """IDs with low <= date < high, in date order."""
+        return [key[1] for key in self.keys[bisect_left(self.keys, (low,)):bisect_left(self.keys, (high,))]]
+
+class ExpenseIndex:
+    """One user's expenses keyed by ID, plus a monotonic counter for new IDs.
+
+    Replaces max()-based ID generation, linear scans for updates and list rebuilds for
+    deletes: every operation here is a dict lookup. The dict keeps insertion order, so
+    records() still returns expenses in the order they were added.
+    """
+
+    def __init__(self, expenses=(), next_id=None):
+        self.by_id = {e["id"]: e for e in expenses}
+        highest = max(self.by_id, default=0)
+        # The stored counter never goes backwards, so IDs of deleted expenses are not reused
+        self.next_id = max(next_id or 1, highest + 1)
+        self.date_index = None # Built on the first date query, then kept in step
+
+    def dates(self):
+        if self.date_index is None:
+            self.date_index = DateIndex(self.by_id.values())
+        return self.date_index
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def allocate_id(self):
+        new_id = self.next_id
+        self.next_id += 1
+        return new_id
+
+    def add(self, entry):
+        self.by_id[entry["id"]] = entry
+        if entry["id"] >= self.next_id:
+            self.next_id = entry["id"] + 1
+        if self.date_index is not None:
+            self.date_index.add(entry)
+        return entry
+
+    def get(self, expense_id):
+        return self.by_id.get(expense_id)
+
+    def remove_many(self, expense_ids):
+        """Removes every given ID that exists and returns the removed records."""
+        removed = []
+        for expense_id in expense_ids:
+            entry = self.by_id.pop(expense_id, None)
+            if entry is not None:
+                removed.append(entry)
+                if self.date_index is not None:
+                    self.date_index.remove(entry)
+        return removed
+
+    def between(self, low, high):
+        """Dated expenses with low <= date < high (see query.date_bounds), oldest first."""
+        return [self.by_id[expense_id] for expense_id in self.dates().ids_between(low, high)]
+
+    def records(self):
+        return list(self.by_id.values())
@@ -0,0 +1,44 @@
+import os
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+# Advisory, cross-process file locks so the CLI and GUI (or two copies of either) can
+# write the same data folder without overwriting each other.
+
+class FileLock:
+    """Exclusive lock held on `<path>.lock` for the duration of a `with` block."""
+
+    def __init__(self, path):
+        self.lock_path = path + ".lock"
+        self.fd = None
+
+    def __enter__(self):
+        self.fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(self.fd, msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self.fd, 0, os.SEEK_SET)
+                msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self.fd)
+            self.fd = None
+
+def file_signature(path):
+    """(mtime, size, inode) of a file, or None if missing; changes whenever another process rewrites it."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import atexit
+import threading
+
+# Optional load/save and speech timings for the finance app (CLI, GUI and the finance.*
+# tools). Off unless FINANCE_METRICS is set, e.g. FINANCE_METRICS=1 python CLI/CLI.py writes
+# finance_metrics.json and finance_metrics.prom (Prometheus text format) when the app exits;
+# any other value is used as the output path prefix. Next to free when off.
+# Only counts, totals and the longest call are kept: the app times a few loads, saves and
+# speech calls per run, too few for percentiles (autotime's metrics.py has those).
+
+ENV_VAR = "FINANCE_METRICS"
+DEFAULT_PREFIX = "finance_metrics"
+
+class NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_TIMER = NullTimer()
+
+class Timer:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        with self.metrics.lock:
+            stats = self.metrics.timers.setdefault(self.name, [0, 0.0, 0.0]) # count, total, longest
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+        return False
+
+class Metrics:
+    """Thread-safe counters and timers for one run, written out at exit."""
+
+    def __init__(self, prefix=None):
+        self.prefix = prefix
+        self.enabled = prefix is not None
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.timers = {}
+        self.started = time.time()
+        if self.enabled:
+            atexit.register(self.write)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def timer(self, name):
+        return Timer(self, name) if self.enabled else NULL_TIMER
+
+    def summary(self):
+        with self.lock:
+            timers = {name: {"count": count, "total_seconds": round(total, 6),
+                             "mean_ms": round(total / count * 1000, 3), "max_ms": round(longest * 1000, 3)}
+                      for name, (count, total, longest) in self.timers.items()}
+            return {"started": self.started, "duration_seconds": round(time.time() - self.started, 3),
+                    "counters": dict(self.counters), "timers": timers}
+
+    def prometheus(self, summary):
+        lines = []
+        for name, value in sorted(summary["counters"].items()):
+            lines += [f"# TYPE finance_{name}_total counter", f"finance_{name}_total {value}"]
+        for name, stats in sorted(summary["timers"].items()):
+            metric = f"finance_{name}_seconds"
+            lines += [f"# TYPE {metric} summary", f"{metric}_sum {stats['total_seconds']:.6f}",
+                      f"{metric}_count {stats['count']}"]
+        lines += ["# TYPE finance_run_duration_seconds gauge",
+                  f"finance_run_duration_seconds {summary['duration_seconds']}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        """Writes <prefix>.json and <prefix>.prom (each replaced atomically, so scrapers never see half a file)."""
+        if not self.enabled:
+            return
+        summary = self.summary()
+        for path, text in ((f"{self.prefix}.json", json.dumps(summary, indent=2)),
+                           (f"{self.prefix}.prom", self.prometheus(summary))):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+
+def metrics_prefix():
+    """Output prefix from FINANCE_METRICS: unset/'0'/'off' = disabled, '1'/'on' = default name."""
+    value = os.environ.get(ENV_VAR, "").strip()
+    if value.lower() in ("", "0", "off", "false", "no"):
+        return None
+    return DEFAULT_PREFIX if value.lower() in ("1", "on", "true", "yes") else value
+
+metrics = Metrics(metrics_prefix())
@@ -0,0 +1,91 @@
+import os
+import sys
+import json
+import argparse
+
+from .storage import DB_FILE, SQLITE_FILE, SqliteStorage, expense_name
+from .expense_index import ExpenseIndex
+from .aggregates import build_aggregates
+from .sharded import SHARD_DIR, INDEX_FILE, shard_file_name, write_json_atomic
+
+# One-shot copy of finance_data.json into the SQLite backend or the sharded folder
+# layout. Run from the folder that holds the data (the same place CLI.py / GUI.py are
+# started from):
+#   python -m finance.migrate                 (SQLite)
+#   python -m finance.migrate --to sharded
+
+def migrate_json_to_sqlite(json_path=DB_FILE, sqlite_path=SQLITE_FILE):
+    """Copies every user and expense into SQLite, keeping IDs. Returns (users, expenses) copied.
+
+    Safe to re-run: existing rows with the same user/ID are replaced.
+    """
+    with open(json_path, "r") as f:
+        data = json.load(f)
+    users = data.get("users", data)
+
+    storage = SqliteStorage(sqlite_path, seed_default_users=False) # Only the users in the JSON file
+    expense_count = 0
+    try:
+        with storage.lock, storage.conn:
+            for username, user in users.items():
+                rows = [
+                    (username, int(e["id"]), expense_name(e), float(e["cost"]), e.get("date"))
+                    for e in user.get("expenses", [])
+                ]
+                next_id = max([user.get("next_id") or 1] + [row[1] + 1 for row in rows])
+                storage.conn.execute("INSERT OR REPLACE INTO users (username, password, next_id) VALUES (?, ?, ?)",
+                                     (username, user["password"], next_id))
+                storage.conn.executemany("INSERT OR REPLACE INTO expenses VALUES (?, ?, ?, ?, ?)", rows)
+                expense_count += len(rows)
+        for username in users:
+            storage.rebuild_aggregates(username)
+    finally:
+        storage.close()
+    return len(users), expense_count
+
+def migrate_json_to_sharded(json_path=DB_FILE, directory=SHARD_DIR):
+    """Splits finance_data.json into a user index plus one shard per user. Returns (users, expenses) copied."""
+    with open(json_path, "r") as f:
+        data = json.load(f)
+    users = data.get("users", data)
+
+    os.makedirs(os.path.join(directory, "users"), exist_ok=True)
+    index = {}
+    expense_count = 0
+    for username, user in users.items():
+        expenses = user.get("expenses", [])
+        expense_index = ExpenseIndex(expenses, user.get("next_id"))
+        shard = "users/" + shard_file_name(username)
+        write_json_atomic(os.path.join(directory, shard), {
+            "next_id": expense_index.next_id,
+            "expenses": expenses,
+            "aggregates": build_aggregates(expenses).to_dict(),
+        })
+        index[username] = {"password": user["password"], "shard": shard}
+        expense_count += len(expenses)
+    # Index last, so a half-finished migration is never picked up as a complete one
+    write_json_atomic(os.path.join(directory, INDEX_FILE), {"users": index})
+    return len(users), expense_count
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate finance_data.json into the SQLite or sharded backend.")
+    parser.add_argument("--json", default=DB_FILE, help=f"source JSON file (default {DB_FILE})")
+    parser.add_argument("--to", choices=["sqlite", "sharded"], default="sqlite", help="target backend")
+    parser.add_argument("--sqlite", default=SQLITE_FILE, help=f"target database (default {SQLITE_FILE})")
+    parser.add_argument("--shard-dir", default=SHARD_DIR, help=f"target folder (default {SHARD_DIR})")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.json):
+        print(f"❌ Could not find '{args.json}'.")
+        sys.exit(1)
+    if args.to == "sqlite":
+        target = args.sqlite
+        users, expenses = migrate_json_to_sqlite(args.json, target)
+    else:
+        target = args.shard_dir
+        users, expenses = migrate_json_to_sharded(args.json, target)
+    print(f"✅ Migrated {users} users and {expenses} expenses into '{target}'.")
+    print("The CLI and GUI will use it automatically from now on (set FINANCE_STORAGE=json to go back).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import time
+import queue
+import threading
+
+# Background saving for the GUI: handlers only mark the storage as changed and return,
+# and this worker writes once per burst of changes instead of once per click.
+
+SAVE_DELAY = 0.5       # Seconds of quiet after the last change before saving
+MAX_DELAY = 3.0        # Never hold unsaved changes longer than this during a long burst
+MAX_CHANGES = 50       # ...or more than this many changes
+
+class PersistenceWorker:
+    """Coalesces storage changes and saves them on a background thread.
+
+    Status messages ('Saving...', 'All changes saved', 'Save failed: ...') are put on
+    `status`, for the UI thread to pick up (the GUI polls it with root.after).
+    """
+
+    def __init__(self, storage, delay=SAVE_DELAY, max_delay=MAX_DELAY, max_changes=MAX_CHANGES):
+        self.storage = storage
+        self.delay = delay
+        self.max_delay = max_delay
+        self.max_changes = max_changes
+        self.status = queue.Queue()
+        self.cond = threading.Condition()
+        self.pending = 0
+        self.first_change = None
+        self.last_change = None
+        self.stopping = False
+        self.thread = threading.Thread(target=self.run, name="persistence", daemon=True)
+        storage.on_change = self.mark_dirty
+        self.thread.start()
+
+    def mark_dirty(self):
+        with self.cond:
+            now = time.monotonic()
+            if not self.pending:
+                self.first_change = now
+            self.pending += 1
+            self.last_change = now
+            self.cond.notify()
+
+    def due_in(self):
+        """Seconds until the pending changes should be written (0 = now). Caller holds the lock."""
+        if self.stopping or self.pending >= self.max_changes:
+            return 0
+        now = time.monotonic()
+        return max(0, min(self.last_change + self.delay, self.first_change + self.max_delay) - now)
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.stopping:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+                wait = self.due_in()
+                if wait > 0:
+                    self.cond.wait(wait)
+                    continue
+                self.pending = 0
+            self.save()
+
+    def save(self):
+        self.status.put("Saving...")
+        try:
+            self.storage.save()
+            self.status.put("All changes saved")
+        except Exception as e: # Any failure, not just disk errors: the thread must keep running
+            if self.stopping:
+                # Closing: retrying would spin (nothing waits any more), so report and give up
+                self.status.put(f"Save failed, changes not saved: {e}")
+                return
+            self.status.put(f"Save failed: {e}")
+            self.mark_dirty() # Try again after the next delay
+
+    def close(self, timeout=10.0):
+        """Writes anything still pending and stops the worker (call before exiting)."""
+        with self.cond:
+            self.stopping = True
+            self.cond.notify()
+        self.thread.join(timeout)
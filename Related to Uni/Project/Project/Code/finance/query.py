@@ -0,0 +1,60 @@
+import re
+import heapq
+
+from .expense_index import expense_name
+
+# Reports over one user's expenses: a date range (whole days, months or years), grouped by
+# day, month or item with sum/count/average, or the most expensive entries. The JSON and
+# sharded backends answer ranges from ExpenseIndex's sorted date index; SQLite uses its
+# (username, date) index. Undated expenses (older GUI entries) only show up when no range
+# is given.
+
+GROUP_BY = ("day", "month", "item")
+PERIOD = re.compile(r'\d{4}(-\d{2}(-\d{2})?)?')
+
+GROUP_KEYS = {
+    "day": lambda e: e.get("date") or "undated",
+    "month": lambda e: (e.get("date") or "undated")[:7],
+    "item": lambda e: (expense_name(e) or "").strip().lower(),
+}
+
+# SQL spelling of the same keys, for SqliteStorage
+GROUP_BY_SQL = {
+    "day": "COALESCE(date, 'undated')",
+    "month": "COALESCE(substr(date, 1, 7), 'undated')",
+    "item": "lower(trim(COALESCE(item, '')))",
+}
+
+def date_bounds(start=None, end=None):
+    """Turns inclusive 'YYYY', 'YYYY-MM' or 'YYYY-MM-DD' bounds into (low, high) with
+    low <= date < high, e.g. end='2026-03' takes in all of March. Returns None with no bounds.
+    """
+    if not start and not end:
+        return None
+    for value in (start, end):
+        if value and not PERIOD.fullmatch(value):
+            raise ValueError(f"Dates look like 2026, 2026-03 or 2026-03-15, got {value!r}")
+    # '~' sorts after every digit and '-', so it closes off everything that starts with `end`
+    return (start or ""), (end + "~" if end else "~")
+
+def summarise(expenses, group_by="month"):
+    """[(key, total, count, average)]: by key for day/month, biggest total first for items."""
+    if group_by not in GROUP_KEYS:
+        raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+    key = GROUP_KEYS[group_by]
+    groups = {}
+    for e in expenses:
+        group = groups.setdefault(key(e), [0.0, 0])
+        group[0] += e["cost"]
+        group[1] += 1
+    rows = [(k, total, count, total / count) for k, (total, count) in groups.items()]
+    return sort_summary(rows, group_by)
+
+def sort_summary(rows, group_by):
+    if group_by == "item":
+        return sorted(rows, key=lambda row: (-row[1], row[0]))
+    return sorted(rows)
+
+def top_by_cost(expenses, n=10):
+    """The n most expensive entries, most expensive first."""
+    return heapq.nlargest(n, expenses, key=lambda e: e["cost"])
@@ -0,0 +1,91 @@
+import os
+import threading
+from collections import deque
+
+from .metrics import metrics
+
+# Text-to-speech for the CLI. pyttsx3 used to be imported at start-up and a new engine
+# initialised (and waited on) for every message; now one engine lives on a worker thread
+# and speak() only queues text.
+
+class NullSpeech:
+    """Silent backend for headless runs (FINANCE_TTS=off) or when audio is unavailable."""
+
+    def say(self, text):
+        pass
+
+    def close(self):
+        pass
+
+class SpeechWorker:
+    """Speaks queued messages on a dedicated thread that owns a single pyttsx3 engine.
+
+    The queue holds at most `max_pending` messages: when it is full the oldest one is
+    dropped, and a message identical to the last queued one is merged into it, so a burst
+    of actions never leaves the speaker minutes behind the screen.
+    """
+
+    def __init__(self, rate=150, max_pending=2):
+        self.rate = rate
+        self.pending = deque(maxlen=max_pending)
+        self.cond = threading.Condition()
+        self.thread = None
+        self.stopping = False
+        self.disabled = False
+
+    def say(self, text):
+        if self.disabled:
+            return
+        with self.cond:
+            if self.pending and self.pending[-1] == text:
+                metrics.count("tts_merged")
+                return
+            if len(self.pending) == self.pending.maxlen:
+                metrics.count("tts_dropped")
+            self.pending.append(text)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="speech", daemon=True)
+                self.thread.start()
+            self.cond.notify()
+
+    def run(self):
+        try:
+            with metrics.timer("tts_init"):
+                import pyttsx3 # Imported here so start-up never pays for it
+                engine = pyttsx3.init()
+                engine.setProperty('rate', self.rate)
+        except Exception as e:
+            print(f"Sound Error: {e}")
+            self.disabled = True
+            return
+
+        while True:
+            with self.cond:
+                while not self.pending and not self.stopping:
+                    self.cond.wait()
+                if not self.pending:
+                    break
+                text = self.pending.popleft()
+            try:
+                with metrics.timer("tts_speak"):
+                    engine.say(text)
+                    engine.runAndWait()
+            except Exception as e:
+                metrics.count("tts_errors")
+                print(f"Sound Error: {e}")
+        engine.stop()
+
+    def close(self, timeout=2.0):
+        """Lets queued messages finish (up to `timeout` seconds) and stops the worker."""
+        with self.cond:
+            self.stopping = True
+            self.cond.notify()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+def create_speaker(backend=None):
+    """Returns the speech backend named by `backend` or FINANCE_TTS ('pyttsx3' by default, 'off' for none)."""
+    backend = (backend or os.environ.get("FINANCE_TTS", "pyttsx3")).lower()
+    if backend in ("off", "none", "null", "0"):
+        return NullSpeech()
+    return SpeechWorker()
@@ -0,0 +1,230 @@
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .storage import open_storage
+from .sharded import shard_file_name
+from .query import GROUP_KEYS, date_bounds
+from .expense_index import expense_name
+
+# Month-end statements for every account, one file per user, instead of logging in as each
+# user and reading View History:
+#   python -m finance.statements --out statements
+#   python -m finance.statements --start 2026-01 --end 2026-03 --format json --jobs 8
+#   python -m finance.statements --serial          (same output, one process; for checking)
+#
+# Users are split into chunks that a process pool works through; each worker opens the
+# storage itself (forked workers share the parent's already-loaded JSON file), reads one
+# user at a time in batches and writes that user's statement straight away, so memory
+# depends on the chunk size, not on how many users there are.
+
+STATEMENT_DIR = "statements"
+CHUNK_SIZE = 200       # Users per task handed to a worker
+READ_BATCH = 10000     # Expenses read from storage at a time
+ITEMS_PER_MONTH = 10   # Items listed per month; the rest are summed as "(other)"
+
+worker_storage = None # Each worker process's own storage handle
+
+class MonthTotals:
+    """Running total, count, per-item sums and largest expense for one month."""
+
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+        self.items = {}
+        self.largest = None
+
+    def add(self, expense):
+        cost = expense["cost"]
+        self.total += cost
+        self.count += 1
+        item = self.items.setdefault(GROUP_KEYS["item"](expense), [0.0, 0])
+        item[0] += cost
+        item[1] += 1
+        if self.largest is None or cost > self.largest["cost"]:
+            self.largest = expense
+
+    def top_items(self, n=ITEMS_PER_MONTH):
+        """[(item, total, count)], biggest total first; anything past n is folded into '(other)'."""
+        rows = sorted(((k, total, count) for k, (total, count) in self.items.items()), key=lambda r: (-r[1], r[0]))
+        if len(rows) > n:
+            rest = rows[n:]
+            rows = rows[:n] + [("(other)", sum(r[1] for r in rest), sum(r[2] for r in rest))]
+        return rows
+
+def build_statement(storage, username, bounds=None, batch_size=READ_BATCH):
+    """{month: MonthTotals} for one user, read in batches. With `bounds` (from date_bounds),
+    only dated expenses with low <= date < high count, as in the Reports screen."""
+    months = {}
+    for batch in storage.iter_expenses(username, batch_size):
+        for e in batch:
+            day = e.get("date")
+            if bounds is not None and not (day and bounds[0] <= day < bounds[1]):
+                continue
+            month = GROUP_KEYS["month"](e)
+            totals = months.get(month)
+            if totals is None:
+                totals = months[month] = MonthTotals()
+            totals.add(e)
+    return dict(sorted(months.items()))
+
+def statement_dict(username, months, period):
+    return {
+        "user": username,
+        "period": period,
+        "total": sum(m.total for m in months.values()),
+        "count": sum(m.count for m in months.values()),
+        "months": [{
+            "month": month,
+            "total": m.total,
+            "count": m.count,
+            "average": m.total / m.count,
+            "largest": {"id": m.largest["id"], "item": expense_name(m.largest),
+                        "cost": m.largest["cost"], "date": m.largest.get("date")},
+            "items": [{"item": k, "total": total, "count": count} for k, total, count in m.top_items()],
+        } for month, m in months.items()],
+    }
+
+def statement_text(username, months, period):
+    lines = [f"Statement for {username}", f"Period: {period}", ""]
+    total = count = 0
+    if not months:
+        lines.append("No expenses in this period.")
+    for month, m in months.items():
+        total += m.total
+        count += m.count
+        lines.append(f"=== {month} ===   Rs.{m.total:,.2f} in {m.count} expense(s), average Rs.{m.total / m.count:,.2f}")
+        lines.append(f"Largest: #{m.largest['id']} {(expense_name(m.largest) or '')[:30]} Rs.{m.largest['cost']:,.2f}")
+        lines.append(f"{'Item':<20} | {'Total':>14} | {'Count':>5}")
+        lines.append("-" * 45)
+        for item, item_total, item_count in m.top_items():
+            lines.append(f"{item[:20]:<20} | Rs.{item_total:>11,.2f} | {item_count:>5}")
+        lines.append("")
+    lines.append(f"TOTAL: Rs.{total:,.2f} in {count} expense(s)")
+    return "\n".join(lines) + "\n"
+
+def statement_path(out_dir, username, fmt):
+    """Same safe, collision-free name as the user's shard, with the statement's extension."""
+    return os.path.join(out_dir, os.path.splitext(shard_file_name(username))[0] + (".json" if fmt == "json" else ".txt"))
+
+def write_statement(path, text):
+    # Written in place, not via temp file + rename: statements are regenerated output, and
+    # a rename per file was half the run time with tens of thousands of users
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def init_worker(backend):
+    global worker_storage
+    if worker_storage is None: # Already set when the parent's JSON data came along with fork
+        worker_storage = open_storage(backend)
+
+def run_chunk(usernames, out_dir, fmt, start=None, end=None):
+    """Writes the statements for one chunk of users. Returns (users, expenses, total spent)."""
+    bounds = date_bounds(start, end)
+    period = f"{start or 'start'} to {end or 'today'}" if bounds else "all time"
+    expenses, spent = 0, 0.0
+    for username in usernames:
+        months = build_statement(worker_storage, username, bounds)
+        worker_storage.forget(username)
+        if fmt == "json":
+            text = json.dumps(statement_dict(username, months, period), indent=2)
+        else:
+            text = statement_text(username, months, period)
+        write_statement(statement_path(out_dir, username, fmt), text)
+        expenses += sum(m.count for m in months.values())
+        spent += sum(m.total for m in months.values())
+    return len(usernames), expenses, spent
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def generate_statements(backend=None, out_dir=STATEMENT_DIR, fmt="text", start=None, end=None,
+                        jobs=None, chunk_size=CHUNK_SIZE, serial=False, progress=None):
+    """Writes a statement for every user. Returns (users, expenses, total spent).
+
+    `serial` runs every chunk in this process, which should give byte-for-byte the same files.
+    `progress(users done, users total)` is called as chunks finish.
+    """
+    global worker_storage
+    date_bounds(start, end) # Reject bad dates before starting any workers
+    os.makedirs(out_dir, exist_ok=True)
+    storage = open_storage(backend)
+    usernames = storage.user_names()
+    chunks = list(chunked(usernames, max(1, chunk_size)))
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(chunks)))
+    done = [0, 0, 0.0]
+
+    def collect(result):
+        for i, value in enumerate(result):
+            done[i] += value
+        if progress:
+            progress(done[0], len(usernames))
+
+    if serial or jobs == 1:
+        worker_storage = storage
+        try:
+            for chunk in chunks:
+                collect(run_chunk(chunk, out_dir, fmt, start, end))
+        finally:
+            worker_storage = None
+            storage.close()
+        return tuple(done)
+
+    # Forked workers inherit the loaded JSON file instead of each parsing it again; the
+    # SQLite and sharded backends are opened fresh in every worker (connections don't survive fork)
+    context = None
+    if hasattr(storage, "indexes") and "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        worker_storage = storage
+    else:
+        storage.close()
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=context,
+                                 initializer=init_worker, initargs=(backend,)) as pool:
+            futures = [pool.submit(run_chunk, chunk, out_dir, fmt, start, end) for chunk in chunks]
+            for future in as_completed(futures):
+                collect(future.result())
+    finally:
+        worker_storage = None
+        if context is not None:
+            storage.close()
+    return tuple(done)
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a monthly statement file for every user.")
+    parser.add_argument("--out", default=STATEMENT_DIR, help=f"folder for the statements (default {STATEMENT_DIR})")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="statement file format")
+    parser.add_argument("--start", help="first day/month/year to include, e.g. 2026-01 (default: all time)")
+    parser.add_argument("--end", help="last day/month/year to include, e.g. 2026-03")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: number of CPU cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help=f"users per task (default {CHUNK_SIZE})")
+    parser.add_argument("--serial", action="store_true", help="do everything in one process (for checking results)")
+    parser.add_argument("--backend", help="storage backend (default: same choice as the CLI/GUI)")
+    args = parser.parse_args()
+
+    last_report = [0.0]
+
+    def progress(done, total):
+        now = time.perf_counter()
+        if done == total or now - last_report[0] > 2:
+            print(f"  {done} / {total} users")
+            last_report[0] = now
+
+    started = time.perf_counter()
+    try:
+        users, expenses, spent = generate_statements(args.backend, args.out, args.format, args.start, args.end,
+                                                     args.jobs, args.chunk_size, args.serial, progress)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ Wrote {users} statement(s) covering {expenses} expenses (Rs.{spent:,.2f}) to '{args.out}' "
+          f"in {time.perf_counter() - started:.1f}s.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,537 @@
+import os
+import json
+import sqlite3
+import threading
+
+from .expense_index import ExpenseIndex, expense_name
+from .aggregates import SpendingAggregates, build_aggregates, compare_aggregates
+from .metrics import metrics
+from .query import GROUP_BY, GROUP_BY_SQL, date_bounds, summarise, sort_summary, top_by_cost
+
+# Shared storage layer for the CLI and GUI front-ends. Both used to rewrite the whole
+# finance_data.json after every change; they now go through one of these backends.
+
+DB_FILE = "finance_data.json"
+SQLITE_FILE = "finance_data.db"
+DEFAULT_USERS = {"admin": {"password": "123", "expenses": []}}
+
+def update_entry(entry, aggregates, item=None, cost=None):
+    """Applies an edit to an expense dict in place, keeping its aggregates in step."""
+    if item:
+        entry["item" if "item" in entry or "name" not in entry else "name"] = item
+    if cost is not None:
+        aggregates.remove(entry)
+        entry["cost"] = cost
+        aggregates.add(entry)
+
+class JsonStorage:
+    """The original single-file JSON database ({"users": {...}}, indent=4).
+
+    Each user's expenses are held in an ExpenseIndex (built the first time the user is
+    touched) and written back as a plain list, together with the user's next_id counter
+    and spending aggregates.
+    Every change rewrites the file unless `autosave` is off; then `on_change` (if set) is
+    called instead and the caller decides when to save(), e.g. a PersistenceWorker.
+    """
+
+    def __init__(self, path=DB_FILE, autosave=True):
+        self.path = path
+        self.autosave = autosave
+        self.on_change = None
+        self.lock = threading.RLock()
+        self.save_lock = threading.Lock()
+        self.dirty = False # Changes not yet written (only tracked with autosave off)
+        self.users = self.load()
+        self.indexes = {}
+        self.aggregates = {}
+
+    def load(self):
+        if os.path.exists(self.path):
+            with metrics.timer("json_load"), open(self.path, "r") as f:
+                data = json.load(f)
+                # Handle both CLI and GUI structure formats
+                return data.get("users", data)
+        return json.loads(json.dumps(DEFAULT_USERS))
+
+    def index_for(self, username):
+        index = self.indexes.get(username)
+        if index is None:
+            user = self.users[username]
+            index = self.indexes[username] = ExpenseIndex(user.get("expenses", []), user.get("next_id"))
+        return index
+
+    def aggregates_for(self, username):
+        aggregates = self.aggregates.get(username)
+        if aggregates is None:
+            stored = self.users[username].get("aggregates")
+            if stored is not None:
+                aggregates = SpendingAggregates.from_dict(stored)
+            else:
+                aggregates = build_aggregates(self.index_for(username).records())
+            self.aggregates[username] = aggregates
+        return aggregates
+
+    def snapshot(self):
+        """The whole database as plain JSON-ready data, copied so it can be written while edits continue."""
+        users = {}
+        for username, user in self.users.items():
+            index = self.indexes.get(username)
+            if index is None:
+                users[username] = dict(user)
+            else:
+                users[username] = {"password": user["password"], "next_id": index.next_id,
+                                   "expenses": [dict(e) for e in index.records()]}
+            if username in self.aggregates:
+                users[username]["aggregates"] = self.aggregates[username].to_dict()
+            elif "aggregates" in user:
+                # Never loaded, so never changed (every edit goes through aggregates_for): keep as stored
+                users[username]["aggregates"] = user["aggregates"]
+        return {"users": users}
+
+    def save(self):
+        # Only the snapshot holds the data lock; the slow dump runs without it, into a temp
+        # file that replaces the database in one step. The temp name is per process and
+        # thread, so two programs saving at once can't rename each other's file away.
+        with self.lock:
+            data = self.snapshot()
+            self.dirty = False
+        try:
+            with self.save_lock, metrics.timer("json_save"):
+                tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(data, f, indent=4)
+                os.replace(tmp_path, self.path)
+        except BaseException:
+            self.dirty = True
+            raise
+
+    def changed(self):
+        if self.autosave:
+            self.save()
+            return
+        self.dirty = True
+        if self.on_change is not None:
+            self.on_change()
+
+    def user_names(self):
+        return list(self.users)
+
+    def get_user(self, username):
+        """Returns {'password': ...} for an existing user, else None."""
+        user = self.users.get(username)
+        return {"password": user["password"]} if user else None
+
+    def add_user(self, username, password):
+        with self.lock:
+            if username in self.users:
+                return False
+            self.users[username] = {"password": password, "next_id": 1, "expenses": []}
+            self.changed()
+            return True
+
+    def list_expenses(self, username):
+        return self.index_for(username).records()
+
+    def get_expense(self, username, expense_id):
+        return self.index_for(username).get(expense_id)
+
+    def add_expense(self, username, item, cost, date=None):
+        with self.lock:
+            index = self.index_for(username)
+            aggregates = self.aggregates_for(username)
+            entry = {"id": index.allocate_id(), "item": item, "cost": cost}
+            if date:
+                entry["date"] = date
+            index.add(entry)
+            aggregates.add(entry)
+            self.changed()
+            return entry
+
+    def add_expenses_bulk(self, username, rows):
+        """Adds many (item, cost, date) rows with consecutive IDs and saves once. Returns the first ID."""
+        with self.lock:
+            index = self.index_for(username)
+            aggregates = self.aggregates_for(username)
+            first_id = index.next_id
+            for item, cost, date in rows:
+                entry = {"id": index.allocate_id(), "item": item, "cost": cost}
+                if date:
+                    entry["date"] = date
+                index.add(entry)
+                aggregates.add(entry)
+            self.changed()
+            return first_id
+
+    def iter_expenses(self, username, batch_size=10000):
+        """Yields the user's expenses in lists of up to `batch_size`."""
+        records = self.list_expenses(username)
+        for start in range(0, len(records), batch_size):
+            yield records[start:start + batch_size]
+
+    def update_expense(self, username, expense_id, item=None, cost=None):
+        with self.lock:
+            e = self.index_for(username).get(expense_id)
+            if e is None:
+                return False
+            update_entry(e, self.aggregates_for(username), item, cost)
+            self.changed()
+            return True
+
+    def delete_expenses(self, username, expense_ids):
+        """Deletes all the given IDs in one pass; returns how many were removed."""
+        with self.lock:
+            removed = self.index_for(username).remove_many(expense_ids)
+            if removed:
+                aggregates = self.aggregates_for(username)
+                for e in removed:
+                    aggregates.remove(e)
+                self.changed()
+            return len(removed)
+
+    def query_expenses(self, username, start=None, end=None):
+        """Expenses dated from `start` to `end` inclusive, oldest first; all of them with no bounds."""
+        bounds = date_bounds(start, end)
+        with self.lock:
+            index = self.index_for(username)
+            return index.records() if bounds is None else index.between(*bounds)
+
+    def summarise_expenses(self, username, group_by="month", start=None, end=None):
+        return summarise(self.query_expenses(username, start, end), group_by)
+
+    def top_expenses(self, username, n=10, start=None, end=None):
+        return top_by_cost(self.query_expenses(username, start, end), n)
+
+    def get_totals(self, username):
+        """The user's SpendingAggregates (running total, per-day and per-month sums)."""
+        return self.aggregates_for(username)
+
+    def get_total(self, username):
+        return self.aggregates_for(username).total
+
+    def check_aggregates(self, username):
+        """Compares the stored aggregates with a full recomputation; returns the differences."""
+        return compare_aggregates(self.aggregates_for(username), build_aggregates(self.list_expenses(username)))
+
+    def rebuild_aggregates(self, username):
+        with self.lock:
+            aggregates = self.aggregates[username] = build_aggregates(self.list_expenses(username))
+            self.changed()
+            return aggregates
+
+    def forget(self, username):
+        """Folds the user's cached index and aggregates back into the raw data and drops them,
+        so a batch job that reads every user once doesn't end up holding an index per user.
+        """
+        with self.lock:
+            user = self.users[username]
+            index = self.indexes.pop(username, None)
+            if index is not None:
+                user["expenses"] = index.records()
+                user["next_id"] = index.next_id
+            aggregates = self.aggregates.pop(username, None)
+            if aggregates is not None:
+                user["aggregates"] = aggregates.to_dict()
+
+    def close(self):
+        if self.dirty: # Only if something changed since the last save
+            self.save()
+
+class SqliteStorage:
+    """SQLite backend: each change touches only its own rows instead of rewriting the database.
+
+    Runs in WAL mode with one connection shared (under a lock) by all threads of the app.
+    A new, empty database gets the default admin account unless `seed_default_users` is off
+    (the migration copies the real users in instead).
+    """
+
+    def __init__(self, path=SQLITE_FILE, seed_default_users=True):
+        self.path = path
+        self.on_change = None # Unused: changes are committed immediately
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_schema(seed_default_users)
+
+    def create_schema(self, seed_default_users=True):
+        with self.lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    username TEXT PRIMARY KEY,
+                    password TEXT NOT NULL,
+                    next_id INTEGER
+                )""")
+            # Databases created before the ID counter existed
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(users)")]
+            if "next_id" not in columns:
+                self.conn.execute("ALTER TABLE users ADD COLUMN next_id INTEGER")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS expenses (
+                    username TEXT NOT NULL REFERENCES users(username),
+                    id INTEGER NOT NULL,
+                    item TEXT,
+                    cost REAL NOT NULL,
+                    date TEXT,
+                    PRIMARY KEY (username, id)
+                ) WITHOUT ROWID""")
+            # Date-range reports seek on this; cost and item are included so grouping never
+            # has to visit the table rows
+            self.conn.execute("CREATE INDEX IF NOT EXISTS expenses_by_date ON expenses (username, date, cost, item)")
+            # Running sums per user; period is 'total', 'count', 'YYYY-MM' or 'YYYY-MM-DD'
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS aggregates (
+                    username TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    PRIMARY KEY (username, period)
+                ) WITHOUT ROWID""")
+            # Databases with expenses from before aggregates existed: build every user's sums now,
+            # before a new expense writes partial rows that would look like complete ones
+            if (self.conn.execute("SELECT 1 FROM aggregates LIMIT 1").fetchone() is None
+                    and self.conn.execute("SELECT 1 FROM expenses LIMIT 1").fetchone() is not None):
+                self.backfill_aggregates()
+            if seed_default_users and self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0:
+                for username, user in DEFAULT_USERS.items():
+                    self.conn.execute("INSERT INTO users (username, password) VALUES (?, ?)",
+                                      (username, user["password"]))
+
+    def backfill_aggregates(self):
+        """Builds the aggregates of every user with expenses (call inside a transaction)."""
+        usernames = [row[0] for row in self.conn.execute("SELECT DISTINCT username FROM expenses")]
+        for username in usernames:
+            rows = self.conn.execute(
+                "SELECT id, item, cost, date FROM expenses WHERE username = ?", (username,)).fetchall()
+            aggregates = build_aggregates(self.row_to_expense(row) for row in rows)
+            self.conn.executemany("INSERT OR REPLACE INTO aggregates VALUES (?, ?, ?)",
+                                  [(username, period, amount) for period, amount in aggregates.periods()])
+
+    def save(self):
+        pass # Every change is committed as it happens
+
+    def user_names(self):
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT username FROM users")]
+
+    def get_user(self, username):
+        with self.lock:
+            row = self.conn.execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()
+        return {"password": row[0]} if row else None
+
+    def add_user(self, username, password):
+        try:
+            with self.lock, self.conn:
+                self.conn.execute("INSERT INTO users (username, password, next_id) VALUES (?, ?, 1)",
+                                  (username, password))
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def row_to_expense(self, row):
+        entry = {"id": row["id"], "item": row["item"], "cost": row["cost"]}
+        if row["date"]:
+            entry["date"] = row["date"]
+        return entry
+
+    def list_expenses(self, username):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, item, cost, date FROM expenses WHERE username = ? ORDER BY id", (username,)).fetchall()
+        return [self.row_to_expense(row) for row in rows]
+
+    def iter_expenses(self, username, batch_size=10000):
+        """Yields the user's expenses in lists of up to `batch_size`, without loading them all."""
+        last_id = 0
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT id, item, cost, date FROM expenses WHERE username = ? AND id > ? ORDER BY id LIMIT ?",
+                    (username, last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1]["id"]
+            yield [self.row_to_expense(row) for row in rows]
+
+    def get_expense(self, username, expense_id):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id, item, cost, date FROM expenses WHERE username = ? AND id = ?",
+                (username, expense_id)).fetchone()
+        return self.row_to_expense(row) if row else None
+
+    def add_expense(self, username, item, cost, date=None):
+        with self.lock, self.conn:
+            new_id = self.allocate_ids(username, 1)
+            self.conn.execute("INSERT INTO expenses VALUES (?, ?, ?, ?, ?)", (username, new_id, item, cost, date))
+            entry = {"id": new_id, "item": item, "cost": cost}
+            if date:
+                entry["date"] = date
+            self.apply_aggregates(username, entry, 1)
+        return entry
+
+    def allocate_ids(self, username, count):
+        """Reserves `count` consecutive IDs from the user's persistent counter (inside a transaction)."""
+        next_id = self.conn.execute("SELECT next_id FROM users WHERE username = ?", (username,)).fetchone()[0]
+        if next_id is None:
+            # Counter not set yet (older or migrated data): start after the highest ID, an index lookup
+            next_id = self.conn.execute(
+                "SELECT COALESCE(MAX(id), 0) + 1 FROM expenses WHERE username = ?", (username,)).fetchone()[0]
+        self.conn.execute("UPDATE users SET next_id = ? WHERE username = ?", (next_id + count, username))
+        return next_id
+
+    def apply_aggregates(self, username, entry, sign):
+        """Adds (sign=1) or removes (sign=-1) one expense from the running sums (inside a transaction)."""
+        cost = sign * entry["cost"]
+        periods = [("total", cost), ("count", sign)]
+        if entry.get("date"):
+            periods += [(entry["date"], cost), (entry["date"][:7], cost)]
+        self.conn.executemany("""
+            INSERT INTO aggregates VALUES (?, ?, ?)
+            ON CONFLICT (username, period) DO UPDATE SET amount = amount + excluded.amount""",
+            [(username, period, amount) for period, amount in periods])
+
+    def add_expenses_bulk(self, username, rows):
+        """Adds many (item, cost, date) rows in one transaction with one ID reservation. Returns the first ID."""
+        batch = SpendingAggregates()
+        with self.lock, self.conn:
+            first_id = self.allocate_ids(username, len(rows))
+            records = [(username, first_id + n, item, cost, date or None) for n, (item, cost, date) in enumerate(rows)]
+            self.conn.executemany("INSERT INTO expenses VALUES (?, ?, ?, ?, ?)", records)
+            for record in records:
+                batch.add({"cost": record[3], "date": record[4]})
+            self.conn.executemany("""
+                INSERT INTO aggregates VALUES (?, ?, ?)
+                ON CONFLICT (username, period) DO UPDATE SET amount = amount + excluded.amount""",
+                [(username, period, amount) for period, amount in batch.periods()])
+        return first_id
+
+    def update_expense(self, username, expense_id, item=None, cost=None):
+        with self.lock, self.conn:
+            old = self.get_expense(username, expense_id)
+            if old is None:
+                return False
+            self.conn.execute(
+                "UPDATE expenses SET item = COALESCE(?, item), cost = COALESCE(?, cost) WHERE username = ? AND id = ?",
+                (item or None, cost, username, expense_id))
+            if cost is not None:
+                self.apply_aggregates(username, old, -1)
+                self.apply_aggregates(username, dict(old, cost=cost), 1)
+        return True
+
+    def delete_expenses(self, username, expense_ids):
+        removed = 0
+        with self.lock, self.conn:
+            for expense_id in expense_ids:
+                old = self.get_expense(username, expense_id)
+                if old is None:
+                    continue
+                self.conn.execute("DELETE FROM expenses WHERE username = ? AND id = ?", (username, expense_id))
+                self.apply_aggregates(username, old, -1)
+                removed += 1
+        return removed
+
+    def query_expenses(self, username, start=None, end=None):
+        """Expenses dated from `start` to `end` inclusive, oldest first; all of them with no bounds."""
+        bounds = date_bounds(start, end)
+        if bounds is None:
+            return self.list_expenses(username)
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, item, cost, date FROM expenses WHERE username = ? AND date >= ? AND date < ? "
+                "ORDER BY date, id", (username, *bounds)).fetchall()
+        return [self.row_to_expense(row) for row in rows]
+
+    def range_filter(self, start, end):
+        """WHERE clause and parameters for an optional date range (uses the expenses_by_date index)."""
+        bounds = date_bounds(start, end)
+        if bounds is None:
+            return "username = ?", ()
+        return "username = ? AND date >= ? AND date < ?", bounds
+
+    def summarise_expenses(self, username, group_by="month", start=None, end=None):
+        if group_by not in GROUP_BY_SQL:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+        where, params = self.range_filter(start, end)
+        key = GROUP_BY_SQL[group_by]
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {key} AS k, SUM(cost), COUNT(*), AVG(cost) FROM expenses WHERE {where} GROUP BY k",
+                (username, *params)).fetchall()
+        return sort_summary([tuple(row) for row in rows], group_by)
+
+    def top_expenses(self, username, n=10, start=None, end=None):
+        where, params = self.range_filter(start, end)
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT id, item, cost, date FROM expenses WHERE {where} ORDER BY cost DESC, id LIMIT ?",
+                (username, *params, n)).fetchall()
+        return [self.row_to_expense(row) for row in rows]
+
+    def get_totals(self, username):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT period, amount FROM aggregates WHERE username = ?", (username,)).fetchall()
+        # No rows means no expenses yet: older databases are backfilled in create_schema, and
+        # finance.check_aggregates --fix rebuilds anything else, so reading never writes
+        aggregates = SpendingAggregates()
+        for period, amount in rows:
+            if period == "total":
+                aggregates.total = amount
+            elif period == "count":
+                aggregates.count = int(amount)
+            elif len(period) == 7:
+                aggregates.by_month[period] = amount
+            else:
+                aggregates.by_day[period] = amount
+        return aggregates
+
+    def get_total(self, username):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT amount FROM aggregates WHERE username = ? AND period = 'total'", (username,)).fetchone()
+        if row is None:
+            return self.get_totals(username).total
+        return row[0]
+
+    def check_aggregates(self, username):
+        return compare_aggregates(self.get_totals(username), build_aggregates(self.list_expenses(username)))
+
+    def rebuild_aggregates(self, username):
+        aggregates = build_aggregates(self.list_expenses(username))
+        rows = [(username, period, amount) for period, amount in aggregates.periods()]
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM aggregates WHERE username = ?", (username,))
+            self.conn.executemany("INSERT INTO aggregates VALUES (?, ?, ?)", rows)
+        return aggregates
+
+    def forget(self, username):
+        pass # Nothing is cached per user
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def open_storage(backend=None, autosave=True):
+    """Opens the backend named by `backend`, the FINANCE_STORAGE environment variable, or
+    whichever migrated store exists (finance_data.db, then a finance_data/ folder with its user index),
+    falling back to finance_data.json.
+
+    autosave=False leaves saving the JSON backend to the caller (SQLite and sharded always write through).
+    """
+    from .sharded import SHARD_DIR, INDEX_FILE, ShardedStorage
+
+    backend = backend or os.environ.get("FINANCE_STORAGE")
+    if backend is None:
+        if os.path.exists(SQLITE_FILE):
+            backend = "sqlite"
+        elif os.path.exists(os.path.join(SHARD_DIR, INDEX_FILE)): # Written last by the migration
+            backend = "sharded"
+        else:
+            backend = "json"
+    if backend == "sqlite":
+        return SqliteStorage(SQLITE_FILE)
+    if backend == "sharded":
+        return ShardedStorage(SHARD_DIR)
+    if backend == "json":
+        return JsonStorage(DB_FILE, autosave)
+    raise ValueError(f"Unknown storage backend '{backend}' (expected 'json', 'sqlite' or 'sharded')")
@@ -0,0 +1,501 @@
+import os
+import sys
+import io
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+import importlib.util
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError: # Windows: peak memory is not recorded
+    resource = None
+
+import datagen
+
+# Benchmarks for the hot paths of the finance app, the autotime pipeline and the 12-hour
+# converter. Each benchmark runs in its own process (so peak memory is its own) on seeded
+# synthetic data, repeated inside that process until it has done at least --min-time seconds
+# of measured work, so a 5 ms benchmark is not judged on a single sample. The result is the
+# median over the processes of each process's median round. Results go to a
+# JSON file that can be compared with a baseline; the allowed slowdown only grows with the
+# noise the baseline itself recorded (record baselines on a quiet machine):
+#
+#   python benchmarks/bench.py --size small                  run and compare with baseline-small.json
+#   python benchmarks/bench.py --size medium --only finance  just the finance benchmarks
+#   python benchmarks/bench.py --size small --save-baseline  record a new baseline
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(REPO, "benchmarks")
+FINANCE_DIR = os.path.join(REPO, "Related to Uni", "Project", "Project", "Code")
+GUI_DIR = os.path.join(FINANCE_DIR, "GUI")
+AUTOTIME_DIR = os.path.join(REPO, "python", "Cities longitudes and latitudes")
+CONVERTER_FILE = os.path.join(REPO, "python", "24 hr to 12 hr", "code.py")
+
+SIZES = {
+    "small": {"expenses": 1_000, "users": 10, "cities": 10},
+    "medium": {"expenses": 100_000, "users": 100, "cities": 1_000},
+    "large": {"expenses": 1_000_000, "users": 1_000, "cities": 10_000},
+}
+DEFAULT_TOLERANCE = 0.25 # Allowed slowdown / memory growth before a result counts as a regression
+MEMORY_SLACK_MB = 5.0    # Memory differences smaller than this are noise
+P95_SLACK_MS = 0.05      # So are p95 differences smaller than this (a few microseconds on tiny operations)
+DEFAULT_REPEAT = 5       # Processes per benchmark; the median of their median rounds is reported
+MIN_TIME = 0.5           # Seconds of measured work per process; short benchmarks run more rounds
+MAX_ROUNDS = 50          # Rounds per process, whatever their length
+NOISE_FACTOR = 2.0       # Allowed slowdown is at least this many times the baseline's noise...
+MAX_TOLERANCE = 0.5      # ...but never more than this
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def summarise(latencies, items=None):
+    """Throughput and latency percentiles from per-operation timings (seconds).
+
+    `items` is how much work all operations did together (rows, calls...), when that is
+    more meaningful than the number of operations.
+    """
+    total = sum(latencies)
+    ordered = sorted(latencies)
+    items = items if items is not None else len(latencies)
+    return {
+        "ops": len(latencies),
+        "items": items,
+        "seconds": round(total, 6),
+        "items_per_sec": round(items / total, 2) if total else None,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 4),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 4),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 4),
+    }
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def peak_memory_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def import_finance():
+    sys.path.insert(0, FINANCE_DIR)
+    import finance
+    return finance
+
+def import_autotime():
+    sys.path.insert(0, AUTOTIME_DIR)
+    import autotime
+    return autotime
+
+# --- finance ---------------------------------------------------------------------------
+
+def finance_data(size):
+    if not os.path.exists("finance_data.json"):
+        datagen.write_finance_json("finance_data.json", size["expenses"], size["users"])
+    with open("finance_data.json") as f:
+        return list(json.load(f)["users"])
+
+def add_expenses(storage, usernames, count, seed=1):
+    rng = random.Random(seed)
+    latencies = []
+    for _ in range(count):
+        args = (rng.choice(usernames), rng.choice(datagen.ITEMS), round(rng.uniform(10, 5000), 2), "2026-10-18")
+        latencies.append(timed(storage.add_expense, *args)[0])
+    return latencies
+
+@benchmark("finance.json_load")
+def bench_json_load(size):
+    finance = import_finance()
+    finance_data(size)
+    latencies = [timed(finance.JsonStorage, "finance_data.json")[0] for _ in range(3)]
+    return summarise(latencies, items=3 * size["expenses"])
+
+@benchmark("finance.json_save")
+def bench_json_save(size):
+    finance = import_finance()
+    finance_data(size)
+    storage = finance.JsonStorage("finance_data.json")
+    latencies = [timed(storage.save)[0] for _ in range(5)]
+    return summarise(latencies, items=5 * size["expenses"])
+
+@benchmark("finance.add_expense_json")
+def bench_add_json(size):
+    """GUI path: changes stay in memory and the persistence worker saves later."""
+    finance = import_finance()
+    users = finance_data(size)
+    storage = finance.JsonStorage("finance_data.json", autosave=False)
+    return summarise(add_expenses(storage, users, 1000))
+
+@benchmark("finance.add_expense_json_autosave")
+def bench_add_json_autosave(size):
+    """CLI path: every add rewrites finance_data.json."""
+    finance = import_finance()
+    users = finance_data(size)
+    storage = finance.JsonStorage("finance_data.json")
+    return summarise(add_expenses(storage, users, 20))
+
+@benchmark("finance.add_expense_sqlite")
+def bench_add_sqlite(size):
+    finance = import_finance()
+    from finance.migrate import migrate_json_to_sqlite
+    users = finance_data(size)
+    migrate_json_to_sqlite("finance_data.json", "finance_data.db")
+    storage = finance.SqliteStorage("finance_data.db")
+    try:
+        return summarise(add_expenses(storage, users, 1000))
+    finally:
+        storage.close()
+
+@benchmark("finance.add_expense_sharded")
+def bench_add_sharded(size):
+    finance = import_finance()
+    from finance.migrate import migrate_json_to_sharded
+    users = finance_data(size)
+    migrate_json_to_sharded("finance_data.json", "finance_data")
+    return summarise(add_expenses(finance.ShardedStorage("finance_data"), users, 200))
+
+@benchmark("finance.date_report")
+def bench_date_report(size):
+    """Year-to-date summary by month for every user."""
+    finance = import_finance()
+    users = finance_data(size)
+    storage = finance.JsonStorage("finance_data.json", autosave=False)
+    latencies = [timed(storage.summarise_expenses, u, "month", "2026")[0] for u in users]
+    return summarise(latencies)
+
+class FakeTree:
+    """Just enough of ttk.Treeview for VirtualExpenseTable, so the table logic runs without a display."""
+
+    def __init__(self):
+        self.rows = []
+
+    def configure(self, **options):
+        pass
+
+    def get_children(self):
+        return list(self.rows)
+
+    def delete(self, *iids):
+        gone = set(iids)
+        self.rows = [iid for iid in self.rows if iid not in gone]
+
+    def insert(self, parent, index, iid=None, values=()):
+        self.rows.insert(len(self.rows) if index == "end" else index, iid)
+
+    def exists(self, iid):
+        return iid in self.rows
+
+@benchmark("finance.refresh_table")
+def bench_refresh_table(size):
+    """Reloading the GUI table with every expense in the dataset (one big account)."""
+    finance = import_finance()
+    sys.path.insert(0, GUI_DIR)
+    from virtual_table import VirtualExpenseTable
+    finance_data(size)
+    storage = finance.JsonStorage("finance_data.json", autosave=False)
+    expenses = [e for u in storage.user_names() for e in storage.list_expenses(u)]
+    rows = [(n, finance.expense_name(e), e["cost"]) for n, e in enumerate(expenses, start=1)]
+    table = VirtualExpenseTable(FakeTree())
+    latencies = []
+    for column in ("ID", "Name", "Cost"):
+        table.sort_column = column
+        latencies.append(timed(table.load, rows)[0])
+    return summarise(latencies, items=3 * len(rows))
+
+# --- autotime --------------------------------------------------------------------------
+
+@benchmark("autotime.generate_city_schedule")
+def bench_city_schedules(size):
+    """Full API path (two calendar months per city) against the local stub server, 8 workers."""
+    autotime = import_autotime()
+    from stub_server import start_stub_server
+    server, url = start_stub_server()
+    autotime.API_BASE_URL = url
+    autotime.rate_limiter = autotime.TokenBucket(1e9, 1e9) # The stub needs no throttling
+    autotime.response_cache = None
+    autotime.month_fetches = autotime.SharedFetches() # Nothing left over from an earlier round
+    autotime.api_client = None # Reconnects to this round's stub server
+    cities = datagen.make_cities(size["cities"])
+
+    def one(city):
+        latency, schedule = timed(autotime.generate_city_schedule, *city[1:])
+        if not schedule:
+            raise RuntimeError(f"no schedule for {city[0]}")
+        return latency
+
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            start = time.perf_counter()
+            latencies = list(pool.map(one, cities))
+            wall = time.perf_counter() - start
+    finally:
+        server.shutdown()
+    result = summarise(latencies)
+    # Requests overlap, so throughput comes from wall-clock time rather than the latency sum
+    result["seconds"] = round(wall, 6)
+    result["items_per_sec"] = round(len(cities) / wall, 2)
+    return result
+
+@benchmark("autotime.local_schedules")
+def bench_local_schedules(size):
+    autotime = import_autotime()
+    if autotime.solar_engine.np is None:
+        return {"skipped": "NumPy is not installed"}
+    cities = datagen.make_cities(size["cities"])
+    chunk = autotime.LOCAL_CHUNK_SIZE
+    latencies = [timed(autotime.generate_local_schedules, cities[i:i + chunk])[0]
+                 for i in range(0, len(cities), chunk)]
+    return summarise(latencies, items=len(cities))
+
+@benchmark("autotime.update_json_file")
+def bench_update_json_file(size):
+    """One-off updates, each re-reading and rewriting a cities.json of the given size."""
+    autotime = import_autotime()
+    datagen.write_schedules_json("cities.json", size["cities"])
+    autotime.JSON_FILE_PATH = "cities.json"
+    updates = min(size["cities"], 50)
+    latencies = [timed(autotime.update_json_file, f"City {i:05d}", datagen.make_schedule(i + 7))[0]
+                 for i in range(updates)]
+    return summarise(latencies)
+
+@benchmark("autotime.schedule_writer")
+def bench_schedule_writer(size):
+    """Batch path: collect every city, write cities.json once."""
+    autotime = import_autotime()
+    schedules = [datagen.make_schedule(i) for i in range(size["cities"])]
+    start = time.perf_counter()
+    writer = autotime.ScheduleWriter("cities.json")
+    for i, schedule in enumerate(schedules):
+        writer.add(f"City {i:05d}", schedule)
+    writer.flush()
+    return summarise([time.perf_counter() - start], items=len(schedules))
+
+# --- 12-hour converter -------------------------------------------------------------------
+
+@benchmark("convert.to_12hr")
+def bench_to_12hr(size):
+    converter = load_module("converter_12h", CONVERTER_FILE)
+    rng = random.Random(0)
+    times = [f"{rng.randrange(24):02d}:{rng.randrange(60):02d}" for _ in range(10_000)]
+    times[::100] = ["5:7"] * len(times[::100]) # A few need the strptime fallback
+    convert = converter.convert_to_12hr_format
+    latencies = []
+    for _ in range(max(1, size["expenses"] // 10_000)):
+        start = time.perf_counter()
+        for t in times:
+            convert(t)
+        latencies.append(time.perf_counter() - start)
+    return summarise(latencies, items=len(latencies) * len(times))
+
+def bench_convert_file(size, stream):
+    converter = load_module("converter_12h", CONVERTER_FILE)
+    datagen.write_schedules_json("cities.json", size["cities"])
+    latencies = [timed(converter.convert_file, "cities.json", stream)[0] for _ in range(3)]
+    return summarise(latencies, items=3 * size["cities"])
+
+@benchmark("convert.stream_file")
+def bench_convert_stream(size):
+    return bench_convert_file(size, True)
+
+@benchmark("convert.load_file")
+def bench_convert_load(size):
+    return bench_convert_file(size, False)
+
+# --- runner ------------------------------------------------------------------------------
+
+def run_child(name, size_name, min_time=MIN_TIME):
+    """Runs one benchmark in this (fresh) process, round after round in a new scratch folder
+    until `min_time` seconds of work were measured, and prints the rounds as JSON."""
+    rounds, measured, started = [], 0.0, time.perf_counter()
+    while True:
+        with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+            os.chdir(workdir)
+            with contextlib.redirect_stdout(io.StringIO()): # Keep the scripts' progress output out of the result
+                result = BENCHMARKS[name](SIZES[size_name])
+            os.chdir(BENCH_DIR)
+        rounds.append(result)
+        if "items_per_sec" not in result:
+            break # Skipped
+        measured += result["seconds"]
+        # Setup can dwarf the measured part (big data files), so wall time is capped as well
+        if measured >= min_time or len(rounds) >= MAX_ROUNDS or time.perf_counter() - started >= 10 * min_time:
+            break
+    print(json.dumps({"rounds": rounds, "peak_memory_mb": peak_memory_mb()}))
+
+def median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+def spread(values):
+    """Median absolute deviation of the values, as a fraction of their median."""
+    middle = median(values)
+    return round(median([abs(v - middle) for v in values]) / middle, 4) if middle else 0.0
+
+def run_process(name, size_name, min_time=MIN_TIME):
+    """One fresh process of a benchmark: {"rounds": [...], "peak_memory_mb": ...} or {"error": ...}."""
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name, "--size", size_name,
+                           "--min-time", str(min_time)], capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def combine(processes):
+    """Reports a benchmark over all its processes: the median round of each process, then the
+    median over the processes, so neither a lucky nor an unlucky round or process moves it.
+    The noise is how much the processes' medians differed."""
+    for child in processes:
+        if "error" in child:
+            return child
+    memory = [child["peak_memory_mb"] for child in processes]
+    process_medians = [] # (median round by throughput, median p95, rounds)
+    for child in processes:
+        timed_rounds = sorted((r for r in child["rounds"] if r.get("items_per_sec")), key=lambda r: r["items_per_sec"])
+        if timed_rounds:
+            process_medians.append((timed_rounds[len(timed_rounds) // 2],
+                                    median([r["p95_ms"] for r in timed_rounds]), len(timed_rounds)))
+    if not process_medians:
+        return dict(processes[0]["rounds"][0], peak_memory_mb=memory[0])
+    rates = [m[0]["items_per_sec"] for m in process_medians]
+    p95s = [m[1] for m in process_medians]
+    # The other figures (p50, ops...) come from the middle process by throughput
+    result = dict(sorted((m[0] for m in process_medians), key=lambda r: r["items_per_sec"])[len(process_medians) // 2])
+    result["items_per_sec"] = round(median(rates), 2)
+    result["p95_ms"] = round(median(p95s), 4)
+    result["rounds"] = sum(m[2] for m in process_medians)
+    result["noise"] = {"items_per_sec": spread(rates), "p95_ms": spread(p95s)}
+    result["peak_memory_mb"] = None if None in memory else median(memory)
+    return result
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def allowed_change(old, metric, tolerance):
+    """The tolerance, widened to NOISE_FACTOR times the noise the baseline recorded for `metric`
+    (never the new run's: a noisy run must not excuse its own slowdown), up to MAX_TOLERANCE."""
+    return max(tolerance, min(NOISE_FACTOR * old.get("noise", {}).get(metric, 0.0), MAX_TOLERANCE))
+
+def compare(results, baseline, tolerance):
+    """Lists (benchmark, message) for every result noticeably worse than the baseline."""
+    regressions = []
+    for name, new in results.items():
+        old = baseline.get(name)
+        if not old or "items_per_sec" not in old or "items_per_sec" not in new:
+            continue
+        if new["items_per_sec"] < old["items_per_sec"] * (1 - allowed_change(old, "items_per_sec", tolerance)):
+            regressions.append((name, f"throughput {old['items_per_sec']:,.0f} -> {new['items_per_sec']:,.0f}/s"))
+        # A p95 is only worth judging when several samples lie above it
+        if (new["ops"] >= 100 and new["p95_ms"] > old["p95_ms"] * (1 + allowed_change(old, "p95_ms", tolerance))
+                and new["p95_ms"] - old["p95_ms"] > P95_SLACK_MS):
+            regressions.append((name, f"p95 {old['p95_ms']:.3f} -> {new['p95_ms']:.3f} ms"))
+        old_mem, new_mem = old.get("peak_memory_mb"), new.get("peak_memory_mb")
+        if old_mem and new_mem and new_mem > old_mem * (1 + tolerance) and new_mem - old_mem > MEMORY_SLACK_MB:
+            regressions.append((name, f"peak memory {old_mem} -> {new_mem} MB"))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the finance app, autotime and the 12h converter.")
+    parser.add_argument("--size", choices=list(SIZES), default="small",
+                        help="data size: small (1k expenses, 10 cities), medium (100k, 1k), large (1M, 10k)")
+    parser.add_argument("--only", action="append", default=[],
+                        help="run benchmarks whose name contains this (repeatable), e.g. finance or to_12hr")
+    parser.add_argument("--output", help="results file (default benchmarks/results-<size>.json)")
+    parser.add_argument("--baseline", help="baseline to compare with (default benchmarks/baseline-<size>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="also write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"allowed slowdown before failing, as a fraction (default {DEFAULT_TOLERANCE})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"processes per benchmark, the median is reported (default {DEFAULT_REPEAT})")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME,
+                        help=f"seconds of measured work per process; short benchmarks run more rounds (default {MIN_TIME})")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.size, args.min_time)
+        return
+
+    names = [n for n in BENCHMARKS if not args.only or any(part in n for part in args.only)]
+    print(f"Running {len(names)} benchmark(s) at size '{args.size}' ({SIZES[args.size]})")
+    # The processes of one benchmark are spread over the whole run (every benchmark once, then
+    # again...), so a slow spell on the machine hits one of them rather than all
+    processes = {name: [] for name in names}
+    for attempt in range(max(1, args.repeat)):
+        print(f"  pass {attempt + 1} of {max(1, args.repeat)}...")
+        for name in names:
+            if not any("error" in child for child in processes[name]):
+                processes[name].append(run_process(name, args.size, args.min_time))
+    results = {}
+    for name in names:
+        result = results[name] = combine(processes[name])
+        if "items_per_sec" in result:
+            print(f"  {name:<36} {result['items_per_sec']:>14,.0f}/s   p50 {result['p50_ms']:>9.3f} ms"
+                  f"   p95 {result['p95_ms']:>9.3f} ms   peak {result['peak_memory_mb']} MB"
+                  f"   ({result['rounds']} rounds, noise {result['noise']['items_per_sec']:.0%})")
+        else:
+            print(f"  {name:<36} {result.get('error') or result.get('skipped')}")
+
+    report = {
+        "meta": {"size": args.size, "repeat": args.repeat, "min_time": args.min_time, **SIZES[args.size],
+                 "python": platform.python_version(), "platform": platform.platform(), "commit": git_commit(),
+                 "timestamp": datetime.now().isoformat(timespec="seconds")},
+        "results": results,
+    }
+    output = args.output or os.path.join(BENCH_DIR, f"results-{args.size}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    baseline_path = args.baseline or os.path.join(BENCH_DIR, f"baseline-{args.size}.json")
+    if args.save_baseline:
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+    elif os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for name, message in regressions:
+            print(f"[!] {name}: {message}")
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) against {baseline_path} "
+                  f"(commit {baseline['meta'].get('commit')}).")
+            sys.exit(1)
+        print(f"✅ No regressions against {baseline_path}.")
+    else:
+        print("No baseline to compare with (run with --save-baseline to record one).")
+
+    if any("error" in r for r in results.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import json
+import random
+from datetime import date, timedelta
+
+# Synthetic, seeded data for the benchmarks: the same size and seed always give the same files.
+
+ITEMS = ["Tea", "Lunch", "Bus fare", "Books", "Rent", "Groceries", "Mobile load", "Printing",
+         "Fuel", "Electricity", "Snacks", "Stationery", "Rickshaw", "Dinner", "Internet"]
+FIRST_DAY = date(2025, 1, 1)
+
+def make_finance_data(total_expenses, users=100, seed=0):
+    """{"users": {...}} in the finance_data.json layout, with expenses spread over `users` accounts."""
+    rng = random.Random(seed)
+    users = max(1, min(users, total_expenses or 1))
+    data = {"users": {}}
+    per_user, extra = divmod(total_expenses, users)
+    for u in range(users):
+        expenses = []
+        for i in range(per_user + (u < extra)):
+            expenses.append({
+                "id": i + 1,
+                "item": rng.choice(ITEMS),
+                "cost": round(rng.uniform(10, 5000), 2),
+                "date": (FIRST_DAY + timedelta(days=rng.randrange(640))).isoformat(),
+            })
+        data["users"][f"user{u:04d}"] = {"password": "pw", "expenses": expenses, "next_id": len(expenses) + 1}
+    return data
+
+def write_finance_json(path, total_expenses, users=100, seed=0):
+    data = make_finance_data(total_expenses, users, seed)
+    with open(path, "w") as f:
+        json.dump(data, f)
+    return data
+
+def make_cities(count, seed=0):
+    """(name, lat, lon, sehr_offset, iftar_offset) tuples scattered over Pakistan."""
+    rng = random.Random(seed)
+    return [(f"City {i:05d}", round(rng.uniform(24.0, 37.0), 4), round(rng.uniform(61.0, 77.0), 4),
+             rng.choice([0, 0, 0, -2, 2]), rng.choice([0, 0, 0, 1, 3]))
+            for i in range(count)]
+
+def input_lines(cities):
+    """The cities as input_cities.txt lines."""
+    return [f"{name}, {lat}, {lon}, {so}, {io}\n" for name, lat, lon, so, io in cities]
+
+def make_schedule(seed=0, days=30):
+    """One city's schedule in the cities.json layout."""
+    rng = random.Random(seed)
+    sehr, iftar = rng.randrange(4 * 60, 6 * 60), rng.randrange(17 * 60, 19 * 60)
+    return [{"day": n + 1, "date": (date(2026, 2, 19) + timedelta(days=n)).isoformat(),
+             "sehr": f"{(sehr - n) // 60:02d}:{(sehr - n) % 60:02d}",
+             "iftar": f"{(iftar + n) // 60:02d}:{(iftar + n) % 60:02d}"}
+            for n in range(days)]
+
+def write_schedules_json(path, city_count, seed=0):
+    """A cities.json with `city_count` cities, written like json.dump(..., indent=2)."""
+    data = {f"City {i:05d}": make_schedule(seed + i) for i in range(city_count)}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    return data
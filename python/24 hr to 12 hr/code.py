@@ -1,53 +1,205 @@
 import json
+import re
 from datetime import datetime
 import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+# Every valid 'HH:MM' mapped to its 12-hour form, so conversion is one dictionary lookup
+TWELVE_HOUR_TABLE = {
+    f"{minute // 60:02d}:{minute % 60:02d}": f"{(minute // 60) % 12 or 12:02d}:{minute % 60:02d}"
+    for minute in range(24 * 60)
+}
+
+CHUNK_SIZE = 1024 * 1024 # Characters read at a time in streaming mode
+WHITESPACE = re.compile(r'[ \t\r\n]*')
 
 def convert_to_12hr_format(time_str):
     """
     Converts a 24-hour time string (e.g., '17:56') to a 12-hour format without AM/PM (e.g., '05:56').
     """
+    converted = TWELVE_HOUR_TABLE.get(time_str)
+    if converted is not None:
+        return converted
     try:
-        # Parse the string into a datetime object using 24-hour format (%H:%M)
+        # Unusual input (e.g. '5:7'): fall back to parsing it with the 24-hour format (%H:%M)
         time_obj = datetime.strptime(time_str, "%H:%M")
         # Format the datetime object back into a string using 12-hour format (%I:%M) without AM/PM
         return time_obj.strftime("%I:%M")
-    except ValueError:
+    except (ValueError, TypeError):
         # If the time is invalid or already converted, return it as is to avoid crashing
         return time_str
 
-def main():
-    input_filename = 'cities.json'
-    output_filename = 'cities_12hr.json'
+def convert_day(day):
+    """Converts the 'sehr' and 'iftar' times of one day entry in place."""
+    if 'sehr' in day:
+        day['sehr'] = convert_to_12hr_format(day['sehr'])
+    if 'iftar' in day:
+        day['iftar'] = convert_to_12hr_format(day['iftar'])
+    return day
 
-    # 1. Check if the input file exists
-    if not os.path.exists(input_filename):
-        print(f"Error: The file '{input_filename}' was not found in the current directory.")
-        return
+class JsonStreamReader:
+    """Reads a {"city": [ {day}, ... ], ...} file piece by piece instead of loading it whole.
+
+    Only one day object is decoded at a time, so memory stays flat however many cities or days there are.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.buffer = ''
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+        self.eof = False
+
+    def fill(self):
+        """Reads the next chunk; returns False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.file.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it ('' at end of file)."""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' but found '{self.peek()}'")
+        self.pos += 1
+
+    def value(self):
+        """Decodes one complete JSON value (a city name or a day object), reading more input if it is cut off."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number at the very end of the buffer might continue in the next chunk
+                if end < len(self.buffer) or self.eof or not isinstance(value, (int, float)):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if not self.fill():
+                value, self.pos = self.decoder.raw_decode(self.buffer, self.pos)
+                return value
+
+    def items(self):
+        """Yields (city, day iterator) pairs; each day iterator must be consumed before the next city."""
+        self.expect('{')
+        if self.peek() == '}':
+            return
+        while True:
+            city = self.value()
+            self.expect(':')
+            yield city, self.days()
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect('}')
+            return
 
-    # 2. Load the JSON data
-    print(f"Loading data from '{input_filename}'...")
+    def days(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect(']')
+            return
+
+def format_day(day):
+    """Renders one day object exactly as json.dump(..., indent=2) would at array depth."""
+    if not isinstance(day, dict) or not day:
+        return '    ' + '\n    '.join(json.dumps(day, indent=2).split('\n'))
+    fields = ',\n'.join(f'      {json.dumps(key)}: {json.dumps(value)}' for key, value in day.items())
+    return f'    {{\n{fields}\n    }}'
+
+def stream_convert(input_filename, output_filename):
+    """Converts one file city by city, writing the same layout as json.dump(..., indent=2) as it goes."""
+    with open(input_filename, 'r', encoding='utf-8') as source, \
+         open(output_filename, 'w', encoding='utf-8') as target:
+        target.write('{')
+        first_city = True
+        for city, days in JsonStreamReader(source).items():
+            target.write(('\n' if first_city else ',\n') + f'  {json.dumps(city)}: [')
+            first_city = False
+            first_day = True
+            for day in days:
+                target.write(('\n' if first_day else ',\n') + format_day(convert_day(day)))
+                first_day = False
+            target.write(']' if first_day else '\n  ]')
+        target.write('}' if first_city else '\n}')
+
+def load_convert(input_filename, output_filename):
+    """Original in-memory conversion: load everything, convert, dump with indent=2."""
     with open(input_filename, 'r', encoding='utf-8') as file:
         cities_data = json.load(file)
 
-    # 3. Iterate through the cities and their daily timings to convert the times
-    print("Converting times to 12-hour format...")
     for city, timings in cities_data.items():
         for day in timings:
-            # Check and convert 'sehr'
-            if 'sehr' in day:
-                day['sehr'] = convert_to_12hr_format(day['sehr'])
-            
-            # Check and convert 'iftar'
-            if 'iftar' in day:
-                day['iftar'] = convert_to_12hr_format(day['iftar'])
-
-    # 4. Save the modified data to a new JSON file
-    print(f"Saving updated data to '{output_filename}'...")
+            convert_day(day)
+
     with open(output_filename, 'w', encoding='utf-8') as file:
         # indent=2 makes the JSON file nicely formatted and readable
         json.dump(cities_data, file, indent=2)
 
+def output_name_for(input_filename):
+    """cities.json -> cities_12hr.json (next to the input)."""
+    root, ext = os.path.splitext(input_filename)
+    return f"{root}_12hr{ext or '.json'}"
+
+def convert_file(input_filename, stream=True):
+    output_filename = output_name_for(input_filename)
+    if stream:
+        stream_convert(input_filename, output_filename)
+    else:
+        load_convert(input_filename, output_filename)
+    return output_filename
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert sehr/iftar times in city JSON files to 12-hour format.")
+    parser.add_argument("files", nargs="*", default=['cities.json'], help="input files (default cities.json)")
+    parser.add_argument("--no-stream", action="store_true",
+                        help="load each file fully into memory instead of streaming it")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="files converted in parallel (default: number of CPU cores)")
+    args = parser.parse_args()
+
+    # 1. Check that the input files exist
+    missing = [name for name in args.files if not os.path.exists(name)]
+    for name in missing:
+        print(f"Error: The file '{name}' was not found in the current directory.")
+    files = [name for name in args.files if name not in missing]
+    if not files:
+        return
+
+    # 2. Convert each file, spreading several files across CPU cores
+    print(f"Converting {len(files)} file(s) to 12-hour format...")
+    stream = not args.no_stream
+    if len(files) == 1 or args.jobs <= 1:
+        outputs = [convert_file(name, stream) for name in files]
+    else:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(files))) as pool:
+            outputs = list(pool.map(convert_file, files, [stream] * len(files)))
+
+    for input_filename, output_filename in zip(files, outputs):
+        print(f"Saved '{input_filename}' -> '{output_filename}'")
     print("Conversion complete! Your new file is ready.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
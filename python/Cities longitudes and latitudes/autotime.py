@@ -1,119 +1,342 @@
 import json
-import urllib.request
-import urllib.error
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
 import time
+import random
+import threading
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from response_cache import DEFAULT_SOURCE, ResponseCache, grid_coords
+import solar_engine
+from metrics import metrics
+from checkpoint import MANIFEST_FILE, CheckpointManifest, split_pending
+from shard_output import write_sharded_output
+from range_planner import SharedFetches, parse_date, plan_range
+import http_client
+from http_client import HttpClient, HttpError
 
 # Configuration
 RAMADAN_START_DATE = datetime(2026, 2, 19)
-TOTAL_DAYS = 30
+TOTAL_DAYS = 30 # Default span; --start/--days/--end plan any other range
 JSON_FILE_PATH = "cities.json"
+TWELVE_HOUR_FILE_PATH = "cities_12hr.json"
 INPUT_FILE_PATH = "input_cities.txt"
+DEFAULT_API_URL = os.environ.get("ALADHAN_API_URL", DEFAULT_SOURCE)
+API_BASE_URL = DEFAULT_API_URL
+
+# Concurrency / rate limiting defaults (the old fixed 1.5s sleep was ~1.3 requests/sec)
+DEFAULT_WORKERS = 4
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+DEFAULT_BURST = 4
+
+# Response cache defaults
+CACHE_DIR = ".aladhan_cache"
+DEFAULT_CACHE_TTL_DAYS = 30
+DEFAULT_CACHE_MAX_ENTRIES = 5000
+
+# Retries for cities whose schedule came back incomplete (network blip, rate-limit ban...)
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0 # Seconds before the first retry; doubles each time, with +/-50% jitter
+
+class TokenBucket:
+    """Thread-safe token bucket: allows `rate` requests per second with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until one token is available, then consumes it."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+rate_limiter = TokenBucket(DEFAULT_REQUESTS_PER_SECOND, DEFAULT_BURST)
+response_cache = None # Set up in main(); None disables caching
+offline_mode = False
+schedule_backend = "api" # "api" = Aladhan calendar, "local" = offline solar_engine
+month_fetches = SharedFetches() # Cities in the same cache cell share each month's request
+# Pooled keep-alive client for API_BASE_URL; timeouts and per-request retries come from the command line
+http_settings = {"timeout": http_client.DEFAULT_TIMEOUT, "retries": http_client.DEFAULT_RETRIES,
+                 "backoff": http_client.DEFAULT_BACKOFF}
+api_client = None
+api_client_lock = threading.Lock()
+LOCAL_CHUNK_SIZE = 1000 # Cities computed per vectorised pass with the local backend
+
+MINUTES_PER_DAY = 24 * 60
+# "HH:MM" for every minute of the day, so formatting is a list lookup
+HHMM_STRINGS = [f"{m // 60:02d}:{m % 60:02d}" for m in range(MINUTES_PER_DAY)]
+# 'HH:MM' -> the 12-hour form without AM/PM ('17:56' -> '05:56'), as "24 hr to 12 hr/code.py" writes it
+TWELVE_HOUR_STRINGS = {HHMM_STRINGS[m]: f"{(m // 60) % 12 or 12:02d}:{m % 60:02d}" for m in range(MINUTES_PER_DAY)}
+
+def to_minutes(time_str):
+    """Converts 'HH:MM' (optionally followed by a timezone like ' (PKT)') to minutes since midnight."""
+    return int(time_str[0:2]) * 60 + int(time_str[3:5])
+
+def format_minutes(minutes):
+    """Converts minutes since midnight back to 'HH:MM', wrapping around midnight in either direction."""
+    return HHMM_STRINGS[minutes % MINUTES_PER_DAY]
 
 def adjust_time(time_str, offset_minutes):
     """Adjusts the given HH:MM time by a specific number of minutes."""
     if not time_str or offset_minutes == 0:
         return time_str
     
-    time_obj = datetime.strptime(time_str, "%H:%M")
-    adjusted_time = time_obj + timedelta(minutes=offset_minutes)
-    return adjusted_time.strftime("%H:%M")
+    return format_minutes(to_minutes(time_str) + offset_minutes)
+
+# The schedule dates and the months they need never change during a run, so they are worked out once
+RAMADAN_PLAN = plan_range(RAMADAN_START_DATE.date(), TOTAL_DAYS)
+schedule_plan = RAMADAN_PLAN # Set from --start/--days/--end in main()
+
+def throttle():
+    """Waits for the shared rate limiter; called before every HTTP attempt, retries included."""
+    with metrics.timer("rate_limit_wait"):
+        rate_limiter.acquire()
+
+def get_api_client():
+    """The shared HttpClient, (re)created when API_BASE_URL or the settings were changed."""
+    global api_client
+    with api_client_lock:
+        if api_client is None or api_client.base_url != API_BASE_URL:
+            if api_client is not None:
+                api_client.close()
+            api_client = HttpClient(API_BASE_URL, before_attempt=throttle, timer_name="fetch_month", **http_settings)
+        return api_client
 
 def fetch_month_data(year, month, lat, lon):
-    """Fetches prayer timings for a specific month using the Aladhan API (Karachi Method)."""
-    url = f"http://api.aladhan.com/v1/calendar/{year}/{month}?latitude={lat}&longitude={lon}&method=1"
+    """Fetches prayer timings for a specific month using the Aladhan API (Karachi Method).
+
+    When the response cache is enabled, coordinates are snapped to the cache grid so that
+    nearby cities share one entry, and cached months are served without touching the network.
+    """
+    if response_cache is not None:
+        lat, lon = grid_coords(lat, lon)
+        cached = response_cache.get(year, month, lat, lon, allow_expired=offline_mode)
+        if cached is not None:
+            metrics.count("cache_hits")
+            return cached
+    if offline_mode:
+        print(f"  [!] {year}-{month:02d} for ({lat}, {lon}) is not cached (offline mode).")
+        return []
+
+    path = f"/v1/calendar/{year}/{month}?latitude={lat}&longitude={lon}&method=1"
     
+    metrics.count("fetch_requests")
     try:
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            return result.get('data', [])
-    except urllib.error.URLError as e:
-        print(f"  [!] Failed to connect to the API: {e}")
+        # Retries of dropped connections, timeouts, 429s and 5xx happen inside the client, which
+        # times each attempt as "fetch_month" (network only; rate-limit and retry waits are separate)
+        body = get_api_client().get(path)
+        metrics.count("fetch_bytes", len(body))
+        with metrics.timer("fetch_parse"):
+            result = json.loads(body.decode('utf-8'))
+        data = result.get('data', [])
+    except (HttpError, ValueError) as e:
+        metrics.count("fetch_failures")
+        print(f"  [!] Failed to fetch {year}-{month:02d} for ({lat}, {lon}): {e}")
         return []
 
-def generate_city_schedule(lat, lon, sehr_offset=0, iftar_offset=0):
-    """Generates the 30-day schedule and applies any manual minute offsets."""
-    feb_data = fetch_month_data(2026, 2, lat, lon)
-    mar_data = fetch_month_data(2026, 3, lat, lon)
-    all_data = feb_data + mar_data
+    if response_cache is not None and data:
+        response_cache.put(year, month, lat, lon, data)
+    return data
+
+def fetch_month_shared(year, month, lat, lon):
+    """fetch_month_data, but cities asking for the same month and location share one request."""
+    key_coords = grid_coords(lat, lon) if response_cache is not None else (lat, lon)
+    return month_fetches.get((year, month) + key_coords, lambda: fetch_month_data(year, month, lat, lon))
+
+def generate_city_schedule(lat, lon, sehr_offset=0, iftar_offset=0, plan=None):
+    """Generates the schedule for the planned date range and applies any manual minute offsets.
+
+    Only the calendar months the range touches are fetched (Feb + Mar 2026 by default).
+    """
+    plan = plan or schedule_plan
+    if schedule_backend == "local":
+        return generate_local_schedules([(None, lat, lon, sehr_offset, iftar_offset)], plan.target_dates)[0]
+
+    all_data = []
+    for year, month in plan.months:
+        all_data += fetch_month_shared(year, month, lat, lon)
     
     if not all_data:
         return None
 
-    schedule = []
-    
-    for i in range(TOTAL_DAYS):
-        current_date = RAMADAN_START_DATE + timedelta(days=i)
-        target_gregorian = current_date.strftime("%d-%m-%Y")
-        target_iso = current_date.strftime("%Y-%m-%d")
-        
-        day_info = next((d for d in all_data if d['date']['gregorian']['date'] == target_gregorian), None)
-        
-        if day_info:
-            base_sehr = day_info['timings']['Fajr'].split(' ')[0]
-            base_iftar = day_info['timings']['Maghrib'].split(' ')[0]
-            
-            final_sehr = adjust_time(base_sehr, sehr_offset)
-            final_iftar = adjust_time(base_iftar, iftar_offset)
-            
-            schedule.append({
-                "day": i + 1,
-                "date": target_iso,
-                "sehr": final_sehr,
-                "iftar": final_iftar
-            })
+    return build_schedule(all_data, sehr_offset, iftar_offset, plan.target_dates)
+
+def generate_with_retries(lat, lon, sehr_offset=0, iftar_offset=0, retries=0, backoff=DEFAULT_BACKOFF):
+    """Runs generate_city_schedule, retrying a failed or incomplete result with exponential backoff.
+
+    Returns (schedule or None, attempts made, last error).
+    """
+    error = None
+    for attempt in range(retries + 1):
+        if attempt:
+            metrics.count("city_retries")
+            time.sleep(backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+        try:
+            schedule = generate_city_schedule(lat, lon, sehr_offset, iftar_offset)
+            error = None
+        except Exception as e:
+            schedule, error = None, str(e)
+        if schedule and len(schedule) == schedule_plan.days:
+            return schedule, attempt + 1, None
+    return None, retries + 1, error or "incomplete schedule"
+
+def build_schedule(all_data, sehr_offset=0, iftar_offset=0, target_dates=None):
+    """Assembles the schedule from the API's day list using a date index and integer minute arithmetic."""
+    target_dates = target_dates or schedule_plan.target_dates
+    with metrics.timer("build_schedule"):
+        days_by_date = {d['date']['gregorian']['date']: d['timings'] for d in all_data}
+
+        schedule = []
+        for day_number, target_gregorian, target_iso in target_dates:
+            timings = days_by_date.get(target_gregorian)
+            if timings:
+                schedule.append({
+                    "day": day_number,
+                    "date": target_iso,
+                    "sehr": HHMM_STRINGS[(to_minutes(timings['Fajr']) + sehr_offset) % MINUTES_PER_DAY],
+                    "iftar": HHMM_STRINGS[(to_minutes(timings['Maghrib']) + iftar_offset) % MINUTES_PER_DAY]
+                })
             
     return schedule
 
-def update_json_file(city_name, schedule_data):
-    """Saves the generated data to the JSON file in a single-line format."""
-    data = {}
-    
-    if os.path.exists(JSON_FILE_PATH):
+def generate_local_schedules(cities, target_dates=None):
+    """Computes schedules for a list of city tuples in one pass of the offline solar engine."""
+    target_dates = target_dates or schedule_plan.target_dates
+    days = [datetime.strptime(iso, "%Y-%m-%d").date() for _, _, iso in target_dates]
+    with metrics.timer("local_solar"):
+        fajr, maghrib = solar_engine.prayer_minutes([c[1] for c in cities], [c[2] for c in cities], days)
+
+    sehr_offsets = solar_engine.np.array([c[3] for c in cities])[:, None]
+    iftar_offsets = solar_engine.np.array([c[4] for c in cities])[:, None]
+    sehr_rows = ((fajr + sehr_offsets) % MINUTES_PER_DAY).tolist()
+    iftar_rows = ((maghrib + iftar_offsets) % MINUTES_PER_DAY).tolist()
+
+    schedules = []
+    for sehr_row, iftar_row in zip(sehr_rows, iftar_rows):
+        schedules.append([
+            {"day": day_number, "date": target_iso, "sehr": HHMM_STRINGS[sehr], "iftar": HHMM_STRINGS[iftar]}
+            for (day_number, _, target_iso), sehr, iftar in zip(target_dates, sehr_row, iftar_row)
+        ])
+    return schedules
+
+def load_json_file(path=JSON_FILE_PATH):
+    """Loads the existing schedules, or an empty dict if the file is missing or unreadable."""
+    if os.path.exists(path):
         try:
-            with open(JSON_FILE_PATH, 'r', encoding='utf-8') as file:
-                data = json.load(file)
+            with metrics.timer("json_load"), open(path, 'r', encoding='utf-8') as file:
+                return json.load(file)
         except json.JSONDecodeError:
             pass
-            
-    data[city_name] = schedule_data
-    
-    # Save with custom inline formatting
-    with open(JSON_FILE_PATH, 'w', encoding='utf-8') as f:
-        f.write('{\n')
-        cities = list(data.keys())
-        for i, city in enumerate(cities):
-            f.write(f'  "{city}": [\n')
-            days = data[city]
-            for j, day in enumerate(days):
-                day_str = f'    {{ "day": {day["day"]}, "date": "{day["date"]}", "sehr": "{day["sehr"]}", "iftar": "{day["iftar"]}" }}'
-                if j < len(days) - 1:
-                    day_str += ','
-                f.write(day_str + '\n')
-            
-            if i < len(cities) - 1:
-                f.write('  ],\n')
-            else:
-                f.write('  ]\n')
-        f.write('}\n')
+    return {}
 
-def main():
-    print("🌙 Roza Siyam - BATCH City Automator 🌙")
-    print("-" * 50)
-    
-    if not os.path.exists(INPUT_FILE_PATH):
-        print(f"❌ Could not find '{INPUT_FILE_PATH}'. Please create it in the same folder.")
-        return
+def format_schedules(data, time_table=None):
+    """Renders all schedules in the custom inline format (one line per day) as a single string.
 
-    # Read the input file
-    with open(INPUT_FILE_PATH, 'r', encoding='utf-8') as file:
-        lines = file.readlines()
+    `time_table` maps each 'HH:MM' to how it should be written, e.g. TWELVE_HOUR_STRINGS.
+    """
+    city_blocks = []
+    for city, days in data.items():
+        if time_table is None:
+            day_lines = ',\n'.join(
+                f'    {{ "day": {day["day"]}, "date": "{day["date"]}", "sehr": "{day["sehr"]}", "iftar": "{day["iftar"]}" }}'
+                for day in days
+            )
+        else:
+            day_lines = ',\n'.join(
+                f'    {{ "day": {day["day"]}, "date": "{day["date"]}", '
+                f'"sehr": "{time_table.get(day["sehr"], day["sehr"])}", "iftar": "{time_table.get(day["iftar"], day["iftar"])}" }}'
+                for day in days
+            )
+        city_blocks.append(f'  {json.dumps(city, ensure_ascii=False)}: [\n{day_lines}\n  ]')
+    return '{\n' + ',\n'.join(city_blocks) + '\n}\n'
 
-    success_count = 0
-    total_cities = 0
+def write_json_atomic(path, data, time_table=None):
+    """Writes the schedules to a temp file in one buffered write, then renames it over `path`.
+
+    The rename is atomic, so a crash mid-write leaves the previous file intact instead of a truncated one.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    try:
+        with metrics.timer("json_save"), open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(format_schedules(data, time_table))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+class ScheduleWriter:
+    """Collects schedules in memory and writes cities.json once at the end (or every `flush_every` cities).
+
+    Replaces calling update_json_file per city, which re-read and rewrote the whole file each time.
+    With `twelve_hour_path`, the 12-hour copy is written from the same data at the same time,
+    so it no longer needs a separate run of the converter over cities.json.
+    Cities already in the file keep their place; new ones are written in `order` (the input
+    order), not in whatever order the worker threads finished them.
+    """
+
+    def __init__(self, path=JSON_FILE_PATH, flush_every=0, manifest=None, twelve_hour_path=None, order=None):
+        self.path = path
+        self.flush_every = flush_every
+        self.manifest = manifest # Saved right after cities.json, so it never runs ahead of it
+        self.twelve_hour_path = twelve_hour_path
+        self.data = load_json_file(path)
+        self.existing = set(self.data)
+        self.positions = {name: i for i, name in enumerate(order or ())}
+        self.pending = 0
+
+    def add(self, city_name, schedule_data):
+        self.data[city_name] = schedule_data
+        self.pending += 1
+        if self.flush_every and self.pending >= self.flush_every:
+            self.flush()
+
+    def sort_new_cities(self):
+        new = [name for name in self.data if name not in self.existing]
+        new.sort(key=lambda name: self.positions.get(name, len(self.positions)))
+        old = [name for name in self.data if name in self.existing]
+        self.data = {name: self.data[name] for name in old + new}
+
+    def flush(self):
+        if self.pending and self.positions:
+            self.sort_new_cities()
+        # The 12-hour copy is also written when it is missing, e.g. asked for on a run where nothing changed
+        if self.twelve_hour_path and self.data and (self.pending or not os.path.exists(self.twelve_hour_path)):
+            write_json_atomic(self.twelve_hour_path, self.data, TWELVE_HOUR_STRINGS)
+        if self.pending:
+            write_json_atomic(self.path, self.data)
+            self.pending = 0
+        if self.manifest is not None:
+            self.manifest.save()
+
+def update_json_file(city_name, schedule_data):
+    """Saves a single city's schedule to the JSON file in a single-line format.
 
+    Convenient for one-off updates; batch runs should go through ScheduleWriter instead.
+    """
+    with metrics.timer("update_json_file"):
+        data = load_json_file(JSON_FILE_PATH)
+        data[city_name] = schedule_data
+        write_json_atomic(JSON_FILE_PATH, data)
+
+def parse_input_lines(lines):
+    """Parses 'City, lat, lon[, sehr_offset, iftar_offset]' lines into a list of city tuples."""
+    cities = []
     for line in lines:
         line = line.strip()
         if not line or line.startswith('#'):
@@ -124,7 +347,6 @@ def main():
             print(f"⏭️ Skipping invalid line: {line}")
             continue
             
-        total_cities += 1
         city_name = parts[0]
         
         try:
@@ -136,22 +358,214 @@ def main():
             print(f"⏭️ Skipping {city_name} - invalid numbers.")
             continue
 
-        print(f"[{total_cities}] Processing {city_name}...", end=" ", flush=True)
-        
-        schedule = generate_city_schedule(lat, lon, sehr_offset, iftar_offset)
-        
-        if schedule and len(schedule) == 30:
-            update_json_file(city_name, schedule)
-            print("✅ Done!")
+        cities.append((city_name, lat, lon, sehr_offset, iftar_offset))
+    return cities
+
+def run_context():
+    """Run-wide inputs that every schedule depends on (part of each city's checkpoint hash).
+
+    The API URL is included so cities built against a stub server are redone against the real API.
+    """
+    source = API_BASE_URL if schedule_backend == "api" else "local"
+    return f"{schedule_backend}|{source}|{schedule_plan.start:%Y-%m-%d}|{schedule_plan.days}"
+
+def process_cities(cities, workers=DEFAULT_WORKERS, flush_every=0, manifest=None, retries=0,
+                   backoff=DEFAULT_BACKOFF, force=False, twelve_hour_path=None):
+    """Builds schedules for all cities on a thread pool and collects them into cities.json.
+
+    Network calls run concurrently (throttled by the shared token bucket); the writer
+    stays on the calling thread so cities.json is never written by two threads at once.
+    Whatever finished is still saved if the run is interrupted.
+
+    With a CheckpointManifest, cities whose inputs are unchanged and whose schedule is
+    already in cities.json are skipped (unless `force`), and each result is recorded.
+    Returns (cities saved, cities skipped).
+    """
+    success_count = 0
+    writer = ScheduleWriter(JSON_FILE_PATH, flush_every, manifest, twelve_hour_path, [city[0] for city in cities])
+    cities, skipped, hashes = split_pending(cities, None if force else manifest, writer.data, run_context())
+    if skipped:
+        names = ", ".join(skipped[:10]) + (f" and {len(skipped) - 10} more" if len(skipped) > 10 else "")
+        print(f"⏭️ Skipping {len(skipped)} unchanged cities already in {JSON_FILE_PATH}: {names}")
+        metrics.count("cities_skipped", len(skipped))
+
+    def record(city_name, status, attempts=1, error=None):
+        if manifest is not None:
+            manifest.mark(city_name, hashes[city_name], status, attempts, error)
+
+    if schedule_backend == "local":
+        try:
+            for start in range(0, len(cities), LOCAL_CHUNK_SIZE):
+                chunk = cities[start:start + LOCAL_CHUNK_SIZE]
+                for city, schedule in zip(chunk, generate_local_schedules(chunk)):
+                    writer.add(city[0], schedule)
+                    record(city[0], "done")
+                    success_count += 1
+                print(f"  Computed {start + len(chunk)} / {len(cities)} cities locally")
+        finally:
+            writer.flush()
+        return success_count, len(skipped)
+
+    def handle(future):
+        nonlocal success_count
+        index, city_name = futures[future]
+        schedule, attempts, error = future.result()
+        if schedule:
+            writer.add(city_name, schedule)
+            record(city_name, "done", attempts)
+            print(f"[{index}] {city_name} ✅ Done!" + (f" (after {attempts} attempts)" if attempts > 1 else ""))
             success_count += 1
+            metrics.count("cities_done")
         else:
-            print("❌ Failed.")
-            
-        # Pause for 1.5 seconds to avoid overloading the API
-        time.sleep(1.5)
+            record(city_name, "failed", attempts, error)
+            print(f"[{index}] {city_name} ❌ Failed after {attempts} attempt(s): {error}")
+            metrics.count("cities_failed")
+
+    # Not a `with` block: its exit waits for every queued city, so Ctrl-C would keep fetching
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    futures = {
+        pool.submit(generate_with_retries, lat, lon, sehr_offset, iftar_offset, retries, backoff): (index, city_name)
+        for index, (city_name, lat, lon, sehr_offset, iftar_offset) in enumerate(cities, start=1)
+    }
+    handled = set()
+    try:
+        for future in as_completed(futures):
+            handle(future)
+            handled.add(future)
+        pool.shutdown()
+    except BaseException:
+        # Interrupted: drop the queued cities, but keep everything that already finished
+        pool.shutdown(wait=False, cancel_futures=True)
+        for future in futures:
+            if future not in handled and future.done() and not future.cancelled():
+                handle(future)
+        print(f"⚠️ Interrupted; saving the {success_count} finished cities.")
+        raise
+    finally:
+        writer.flush()
+
+    return success_count, len(skipped)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-generate Ramadan timings for every city in the input file.")
+    parser.add_argument("--start", type=parse_date, default=RAMADAN_START_DATE.date(),
+                        help=f"first day of the schedule, YYYY-MM-DD (default {RAMADAN_START_DATE:%Y-%m-%d})")
+    span = parser.add_mutually_exclusive_group()
+    span.add_argument("--days", type=int, default=TOTAL_DAYS, help=f"number of days (default {TOTAL_DAYS})")
+    span.add_argument("--end", type=parse_date, help="last day of the schedule instead of --days, e.g. 2028-12-31")
+    parser.add_argument("--twelve-hour", nargs="?", const=TWELVE_HOUR_FILE_PATH, metavar="PATH",
+                        help=f"also write 12-hour times in the same pass (default path {TWELVE_HOUR_FILE_PATH})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"number of cities fetched concurrently (default {DEFAULT_WORKERS}, 1 = sequential)")
+    parser.add_argument("--rate", type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                        help=f"max API requests per second (default {DEFAULT_REQUESTS_PER_SECOND}, 0 = unlimited)")
+    parser.add_argument("--burst", type=int, default=DEFAULT_BURST,
+                        help=f"max requests allowed in a burst (default {DEFAULT_BURST})")
+    parser.add_argument("--api-url", default=DEFAULT_API_URL,
+                        help="base URL of the calendar API, e.g. a local stub_server.py")
+    parser.add_argument("--timeout", type=float, default=http_client.DEFAULT_TIMEOUT,
+                        help=f"seconds to wait for the API to connect or answer (default {http_client.DEFAULT_TIMEOUT})")
+    parser.add_argument("--request-retries", type=int, default=http_client.DEFAULT_RETRIES,
+                        help=f"extra attempts per API request after a drop, timeout, 429 or 5xx "
+                             f"(default {http_client.DEFAULT_RETRIES})")
+    parser.add_argument("--request-backoff", type=float, default=http_client.DEFAULT_BACKOFF,
+                        help=f"seconds before the first request retry, doubling after that; a longer "
+                             f"Retry-After from the server wins (default {http_client.DEFAULT_BACKOFF})")
+    parser.add_argument("--flush-every", type=int, default=0,
+                        help="also save cities.json every N finished cities (default 0 = only once at the end)")
+    parser.add_argument("--backend", choices=["api", "local"], default="api",
+                        help="'api' fetches from Aladhan; 'local' computes offline with solar_engine.py (needs NumPy)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help=f"directory for cached API responses (default {CACHE_DIR})")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_CACHE_TTL_DAYS,
+                        help=f"days before a cached month is fetched again (default {DEFAULT_CACHE_TTL_DAYS})")
+    parser.add_argument("--cache-max-entries", type=int, default=DEFAULT_CACHE_MAX_ENTRIES,
+                        help=f"least recently used entries are evicted beyond this (default {DEFAULT_CACHE_MAX_ENTRIES})")
+    parser.add_argument("--no-cache", action="store_true", help="always fetch from the API")
+    parser.add_argument("--offline", action="store_true",
+                        help="never touch the network; serve everything (even expired entries) from the cache")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help=f"extra attempts for a city that fails (default {DEFAULT_RETRIES}, 0 with --offline)")
+    parser.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF,
+                        help=f"seconds before the first retry, doubling after that (default {DEFAULT_BACKOFF})")
+    parser.add_argument("--manifest", default=MANIFEST_FILE,
+                        help=f"checkpoint file used to skip unchanged cities on re-runs (default {MANIFEST_FILE})")
+    parser.add_argument("--force", action="store_true", help="process every city even if the checkpoint says it is done")
+    parser.add_argument("--shard-dir",
+                        help="also write an index plus one compact file per city here, e.g. ../../Html/schedules")
+    parser.add_argument("--gzip", action="store_true", help="with --shard-dir, also write pre-compressed .gz files")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    global rate_limiter, API_BASE_URL, response_cache, offline_mode, schedule_backend, schedule_plan, api_client
+    global month_fetches
+    args = parse_args(argv)
+    month_fetches = SharedFetches() # Nothing carries over from an earlier run in the same process
+    schedule_backend = args.backend
+    try:
+        schedule_plan = plan_range(args.start, args.days, args.end)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    rate_limiter = TokenBucket(args.rate, args.burst)
+    API_BASE_URL = args.api_url.rstrip('/')
+    http_settings.update(timeout=args.timeout, retries=max(0, args.request_retries), backoff=args.request_backoff)
+    if api_client is not None:
+        api_client.close()
+    api_client = None # Picks up the settings above on first use
+    offline_mode = args.offline
+    if args.offline and args.no_cache:
+        print("❌ --offline needs the cache; drop --no-cache.")
+        return
+    response_cache = None if args.no_cache else ResponseCache(
+        args.cache_dir, ttl_seconds=args.cache_ttl * 24 * 3600, max_entries=args.cache_max_entries,
+        source=API_BASE_URL)
+
+    print("🌙 Roza Siyam - BATCH City Automator 🌙")
+    print("-" * 50)
+    
+    if not os.path.exists(INPUT_FILE_PATH):
+        print(f"❌ Could not find '{INPUT_FILE_PATH}'. Please create it in the same folder.")
+        return
+
+    # Read the input file
+    with open(INPUT_FILE_PATH, 'r', encoding='utf-8') as file:
+        cities = parse_input_lines(file.readlines())
+
+    total_cities = len(cities)
+    print(f"Schedule: {schedule_plan.describe()}")
+    if schedule_backend == "local":
+        print(f"Computing {total_cities} cities offline with the local solar engine...")
+    else:
+        print(f"Processing {total_cities} cities with {args.workers} worker(s) at up to {args.rate} requests/sec...")
+
+    manifest = CheckpointManifest(args.manifest)
+    retries = 0 if args.offline else max(0, args.retries) # Nothing changes between offline attempts
+    success_count, skipped_count = process_cities(cities, args.workers, args.flush_every, manifest,
+                                                  retries, args.backoff, args.force, args.twelve_hour)
 
     print("-" * 50)
-    print(f"🎉 Batch Process Complete! Successfully saved {success_count} out of {total_cities} cities to {JSON_FILE_PATH}.")
+    if response_cache is not None and schedule_backend == "api":
+        print(f"Cache: {response_cache.hits} hits, {response_cache.misses} misses ({args.cache_dir})")
+    if month_fetches.shared:
+        print(f"Shared {month_fetches.shared} month request(s) between cities in the same location.")
+    print(f"🎉 Batch Process Complete! Successfully saved {success_count} out of {total_cities - skipped_count} "
+          f"cities to {JSON_FILE_PATH} ({skipped_count} unchanged cities skipped).")
+    if args.twelve_hour:
+        print(f"🕐 12-hour copy saved to {args.twelve_hour}")
+    if args.shard_dir:
+        coordinates = {city[0]: (city[1], city[2]) for city in cities}
+        written, unchanged = write_sharded_output(load_json_file(JSON_FILE_PATH), coordinates,
+                                                  args.shard_dir, args.gzip)
+        print(f"🗂️ Per-city files in {args.shard_dir}: {written} written, {unchanged} unchanged.")
+    names = {city[0] for city in cities}
+    failed = [name for name in manifest.failed() if name in names]
+    if failed:
+        print(f"⚠️ Still failing (will be retried next run): {', '.join(failed[:10])}"
+              + (f" and {len(failed) - 10} more" if len(failed) > 10 else ""))
+    if metrics.enabled:
+        metrics.write()
+        print(f"📊 Metrics written to {metrics.prefix}.json and {metrics.prefix}.prom")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
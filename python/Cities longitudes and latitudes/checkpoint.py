@@ -0,0 +1,78 @@
+import os
+import json
+import time
+import hashlib
+
+# Checkpoint manifest for autotime.py: remembers, per city, a hash of the inputs its
+# schedule was built from and whether that worked. A re-run skips every city whose line in
+# input_cities.txt is unchanged and whose schedule is already in cities.json, so resuming
+# after a crash or adding a few cities to a long list only costs the new/changed lines.
+#
+#   {"version": 1, "cities": {"Lahore": {"hash": "...", "status": "done", "attempts": 1,
+#                                        "updated": 1760000000.0}, ...}}
+
+MANIFEST_FILE = ".autotime_manifest.json"
+MANIFEST_VERSION = 1
+
+def city_hash(lat, lon, sehr_offset, iftar_offset, context=""):
+    """Short fingerprint of everything a city's schedule depends on.
+
+    `context` carries run-wide inputs (backend, Ramadan dates) so changing those redoes every city.
+    """
+    key = f"{lat!r}|{lon!r}|{sehr_offset}|{iftar_offset}|{context}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+class CheckpointManifest:
+    """Per-city status, loaded from and saved (atomically) to a small JSON file."""
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self.cities = {}
+        self.dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == MANIFEST_VERSION:
+                    self.cities = data.get("cities", {})
+            except (json.JSONDecodeError, OSError):
+                print(f"  [!] Ignoring unreadable checkpoint '{path}'; every city will be processed.")
+
+    def is_done(self, city_name, input_hash):
+        entry = self.cities.get(city_name)
+        return entry is not None and entry["status"] == "done" and entry["hash"] == input_hash
+
+    def mark(self, city_name, input_hash, status, attempts, error=None):
+        entry = {"hash": input_hash, "status": status, "attempts": attempts, "updated": round(time.time(), 3)}
+        if error:
+            entry["error"] = error
+        self.cities[city_name] = entry
+        self.dirty = True
+
+    def failed(self):
+        return sorted(name for name, entry in self.cities.items() if entry["status"] == "failed")
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "cities": self.cities}, f, indent=1)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+def split_pending(cities, manifest, existing, context=""):
+    """Splits city tuples into (to_process, skipped) and returns the input hash of each city by name.
+
+    A city is skipped only if its inputs are unchanged since it last succeeded *and* its
+    schedule is still in the output (`existing`), so a deleted cities.json redoes everything.
+    """
+    hashes, pending, skipped = {}, [], []
+    for city in cities:
+        name, lat, lon, sehr_offset, iftar_offset = city
+        hashes[name] = city_hash(lat, lon, sehr_offset, iftar_offset, context)
+        if manifest is not None and name in existing and manifest.is_done(name, hashes[name]):
+            skipped.append(name)
+        else:
+            pending.append(city)
+    return pending, skipped, hashes
@@ -0,0 +1,178 @@
+import gzip
+import time
+import queue
+import random
+import http.client
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from metrics import metrics
+
+# Small pooled HTTP client for the calendar API. urlopen() made a new TCP (and TLS)
+# connection for every month of every city and gave up on the first error; this keeps
+# idle keep-alive connections to the host for the next request, asks for gzip, and
+# retries dropped connections, timeouts, 429s and 5xx errors with jittered exponential
+# backoff, waiting at least as long as the server's Retry-After says (or giving up at
+# once if that is longer than MAX_RETRY_AFTER).
+
+DEFAULT_TIMEOUT = 15.0       # Seconds for connecting and for each read
+DEFAULT_RETRIES = 4          # Extra attempts per request
+DEFAULT_BACKOFF = 0.5        # Seconds before the first retry; doubles each time, with +/-50% jitter
+MAX_BACKOFF = 30.0           # Longest computed wait between attempts
+MAX_RETRY_AFTER = 300.0      # A server asking us to wait longer than this fails the request instead
+DEFAULT_POOL_SIZE = 8        # Idle connections kept (one per worker thread is plenty)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class HttpError(Exception):
+    """A request that still failed after all retries (or got a status that is not worth retrying)."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+def retry_after_seconds(value):
+    """Seconds from a Retry-After header (either a number of seconds or an HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+class HttpClient:
+    """GETs against one base URL over a pool of keep-alive connections. Thread-safe.
+
+    `before_attempt` (optional) is called before every attempt, retries included, e.g. to
+    take a token from the rate limiter. Each attempt's network time is recorded under the
+    `timer_name` metric and time slept between retries under "http_retry_wait", so neither
+    includes the other or the rate-limit wait.
+    """
+
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 max_backoff=MAX_BACKOFF, pool_size=DEFAULT_POOL_SIZE, headers=None, before_attempt=None,
+                 max_retry_after=MAX_RETRY_AFTER, timer_name="http_request"):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL '{base_url}'")
+        self.base_url = base_url
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.timer_name = timer_name
+        self.headers = {"User-Agent": "Mozilla/5.0", "Accept-Encoding": "gzip", "Connection": "keep-alive"}
+        self.headers.update(headers or {})
+        self.before_attempt = before_attempt
+        self.idle = queue.LifoQueue(maxsize=max(1, pool_size)) # Most recently used first: least likely to have timed out
+
+    def new_connection(self):
+        metrics.count("http_connections_opened")
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def take_connection(self):
+        """(connection, reused?) - an idle pooled one if there is any."""
+        try:
+            return self.idle.get_nowait(), True
+        except queue.Empty:
+            return self.new_connection(), False
+
+    def give_back(self, conn):
+        try:
+            self.idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def send(self, conn, path):
+        try:
+            conn.request("GET", self.base_path + path, headers=self.headers)
+            response = conn.getresponse()
+            return response, response.read()
+        except BaseException:
+            conn.close()
+            raise
+
+    def request_once(self, path):
+        """One GET. Returns (status, response, body). Raises OSError / HTTPException on connection trouble."""
+        conn, reused = self.take_connection()
+        try:
+            response, body = self.send(conn, path)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            if not reused:
+                raise
+            # The server closed an idle keep-alive connection; that is not a real failure,
+            # so try once more straight away on a fresh connection
+            metrics.count("http_stale_connections")
+            conn, reused = self.new_connection(), False
+            response, body = self.send(conn, path)
+
+        if reused:
+            metrics.count("http_connections_reused")
+        if response.will_close:
+            conn.close()
+        else:
+            self.give_back(conn)
+        if response.getheader("Content-Encoding", "").lower() == "gzip":
+            metrics.count("http_compressed_bytes", len(body))
+            body = gzip.decompress(body)
+        return response.status, response, body
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to wait before retry number `attempt` (1, 2, ...).
+
+        max_backoff only caps our own backoff; the server's Retry-After is always waited out in full.
+        """
+        wait = min(self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5), self.max_backoff)
+        if retry_after is not None:
+            wait = max(wait, retry_after)
+        return wait
+
+    def get(self, path):
+        """GETs `path` (relative to the base URL) and returns the decoded body bytes.
+
+        Raises HttpError once the retries are used up, or at once for statuses like 400/404.
+        """
+        error = retry_after = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                metrics.count("http_retries")
+                wait = self.delay(attempt, retry_after)
+                metrics.observe("http_retry_wait", wait)
+                time.sleep(wait)
+            retry_after = None
+            if self.before_attempt is not None:
+                self.before_attempt()
+            try:
+                with metrics.timer(self.timer_name):
+                    status, response, body = self.request_once(path)
+            except (OSError, EOFError, http.client.HTTPException) as e: # Drops, resets, timeouts, cut-off gzip
+                metrics.count("http_connection_errors")
+                error = HttpError(f"{type(e).__name__}: {e}")
+                continue
+            if status == 200:
+                return body
+            error = HttpError(f"HTTP {status} {response.reason}", status)
+            if status not in RETRY_STATUSES:
+                raise error
+            metrics.count("http_throttled" if status == 429 else "http_server_errors")
+            retry_after = retry_after_seconds(response.getheader("Retry-After"))
+            if retry_after is not None and retry_after > self.max_retry_after:
+                raise HttpError(f"{error}; server asked to wait {retry_after:.0f}s, more than the "
+                                f"{self.max_retry_after:.0f}s limit", status)
+        raise HttpError(f"gave up after {self.retries + 1} attempt(s): {error}", error.status if error else None)
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import atexit
+import random
+import threading
+
+# Optional timers and counters for autotime.py. Off unless AUTOTIME_METRICS is set:
+#   AUTOTIME_METRICS=1 python autotime.py            -> autotime_metrics.json + autotime_metrics.prom
+#   AUTOTIME_METRICS=/var/lib/node_exporter/autotime python autotime.py
+# The .prom file is in the Prometheus text format, ready for node_exporter's textfile collector.
+# When off, timer() hands back one shared do-nothing object and count() returns at once.
+
+ENV_VAR = "AUTOTIME_METRICS"
+DEFAULT_PREFIX = "autotime_metrics"
+MAX_SAMPLES = 10000 # Latencies kept per timer for percentiles (reservoir sample beyond this)
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+class NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_TIMER = NullTimer()
+
+class Timer:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+class Metrics:
+    """Thread-safe counters and latency timers for one run, written out at exit."""
+
+    def __init__(self, namespace, prefix=None):
+        self.namespace = namespace
+        self.prefix = prefix
+        self.enabled = prefix is not None
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.timers = {} # name -> [count, total seconds, max, samples]
+        self.started = time.time()
+        if self.enabled:
+            atexit.register(self.write)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def timer(self, name):
+        return Timer(self, name) if self.enabled else NULL_TIMER
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            stats = self.timers.get(name)
+            if stats is None:
+                stats = self.timers[name] = [0, 0.0, 0.0, []]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            samples = stats[3]
+            if len(samples) < MAX_SAMPLES:
+                samples.append(seconds)
+            else:
+                slot = random.randrange(stats[0])
+                if slot < MAX_SAMPLES:
+                    samples[slot] = seconds
+
+    def summary(self):
+        with self.lock:
+            timers = {}
+            for name, (count, total, longest, samples) in self.timers.items():
+                ordered = sorted(samples)
+                timers[name] = {
+                    "count": count,
+                    "total_seconds": round(total, 6),
+                    "mean_ms": round(total / count * 1000, 3),
+                    "max_ms": round(longest * 1000, 3),
+                    **{f"p{int(q * 100)}_ms": round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+                       for q in QUANTILES},
+                }
+            return {"started": self.started, "duration_seconds": round(time.time() - self.started, 3),
+                    "counters": dict(self.counters), "timers": timers}
+
+    def prometheus(self, summary):
+        lines = []
+        for name, value in sorted(summary["counters"].items()):
+            metric = f"{self.namespace}_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, stats in sorted(summary["timers"].items()):
+            metric = f"{self.namespace}_{name}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for q in QUANTILES:
+                lines.append(f'{metric}{{quantile="{q}"}} {stats[f"p{int(q * 100)}_ms"] / 1000:.6f}')
+            lines += [f"{metric}_sum {stats['total_seconds']:.6f}", f"{metric}_count {stats['count']}"]
+        lines += [f"# TYPE {self.namespace}_run_duration_seconds gauge",
+                  f"{self.namespace}_run_duration_seconds {summary['duration_seconds']}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        """Writes <prefix>.json and <prefix>.prom (each replaced atomically, so scrapers never see half a file)."""
+        if not self.enabled:
+            return
+        summary = self.summary()
+        for path, text in ((f"{self.prefix}.json", json.dumps(summary, indent=2)),
+                           (f"{self.prefix}.prom", self.prometheus(summary))):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+
+def metrics_prefix(env_var, default_prefix):
+    """Output prefix from the environment variable: unset/'0'/'off' = disabled, '1'/'on' = default name."""
+    value = os.environ.get(env_var, "").strip()
+    if value.lower() in ("", "0", "off", "false", "no"):
+        return None
+    return default_prefix if value.lower() in ("1", "on", "true", "yes") else value
+
+metrics = Metrics("autotime", metrics_prefix(ENV_VAR, DEFAULT_PREFIX))
@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
+# Works out, once per run, what a schedule for any date span needs: the list of days and
+# exactly which (year, month) calendars cover them. Every city uses the same plan, e.g.
+#   plan_range(date(2026, 2, 19), days=30)      -> 2026-02 and 2026-03
+#   plan_range(date(2026, 1, 1), end=date(2028, 12, 31)) -> 36 months, fetched once each per location
+
+SHARED_FETCH_ENTRIES = 256 # Finished month calendars kept in memory for cities in the same cache cell
+
+def parse_date(text):
+    """'YYYY-MM-DD' -> date (used as an argparse type)."""
+    return date.fromisoformat(text)
+
+def months_needed(start, end):
+    """Every (year, month) from start to end inclusive, in order."""
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+class RangePlan:
+    """The days of a schedule plus the calendar months they fall in."""
+
+    def __init__(self, start, days):
+        if days < 1:
+            raise ValueError("a schedule needs at least one day")
+        self.start = start
+        self.days = days
+        self.end = start + timedelta(days=days - 1)
+        self.dates = [start + timedelta(days=i) for i in range(days)]
+        # (day number, API 'DD-MM-YYYY' key, ISO date) for each day, the shape build_schedule reads
+        self.target_dates = [(i + 1, d.strftime("%d-%m-%Y"), d.isoformat()) for i, d in enumerate(self.dates)]
+        self.months = months_needed(start, self.end)
+
+    def describe(self):
+        return f"{self.start} to {self.end} ({self.days} days, {len(self.months)} calendar month(s) per location)"
+
+def plan_range(start, days=None, end=None):
+    """RangePlan from a start date and either a number of days or an inclusive end date."""
+    if end is not None:
+        if end < start:
+            raise ValueError(f"end date {end} is before start date {start}")
+        days = (end - start).days + 1
+    return RangePlan(start, days)
+
+class SharedFetches:
+    """Makes identical month requests from different cities share one fetch.
+
+    Workers asking for a key that is already being fetched wait for that result instead of
+    sending their own request; the last few results are kept for cities that come later.
+    Empty (failed) results are not kept, so a retry really goes back to the API.
+    """
+
+    def __init__(self, max_entries=SHARED_FETCH_ENTRIES):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.results = OrderedDict()
+        self.in_flight = {} # key -> Event set when the fetch finishes
+        self.shared = 0
+
+    def get(self, key, fetch):
+        while True:
+            with self.lock:
+                if key in self.results:
+                    self.results.move_to_end(key)
+                    self.shared += 1
+                    return self.results[key]
+                event = self.in_flight.get(key)
+                if event is None:
+                    event = self.in_flight[key] = threading.Event()
+                    break
+            event.wait() # Someone else is fetching it; then look again
+
+        data = []
+        try:
+            data = fetch()
+        finally:
+            with self.lock:
+                if data:
+                    self.results[key] = data
+                    while len(self.results) > self.max_entries:
+                        self.results.popitem(last=False)
+                del self.in_flight[key]
+            event.set()
+        return data
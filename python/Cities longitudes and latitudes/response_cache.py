@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+# Coordinates are rounded to this many decimals before building the cache key
+# (2 decimals ~ 1.1 km), so nearby cities share one cached calendar.
+GRID_DECIMALS = 2
+DEFAULT_SOURCE = "http://api.aladhan.com"
+
+def grid_coords(lat, lon, decimals=GRID_DECIMALS):
+    """Snaps a coordinate pair to the cache grid."""
+    return round(lat, decimals), round(lon, decimals)
+
+class ResponseCache:
+    """On-disk cache of calendar API responses.
+
+    Each entry is stored as <sha256 of the request>.json holding the response data,
+    when it was stored and its TTL. The file's mtime doubles as the "last used" time,
+    so once the cache grows past `max_entries` the least recently used files are removed.
+    `source` (the API base URL) is part of every key, so answers from a local stub server
+    are never served to a run against the real API, or the other way round.
+    """
+
+    def __init__(self, directory, ttl_seconds=30 * 24 * 3600, max_entries=5000, method=1, source=DEFAULT_SOURCE):
+        self.directory = directory
+        self.source = source.rstrip('/')
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.method = method
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        # key -> last used time, loaded once so puts don't have to list the directory
+        self.index = {}
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                self.index[name[:-5]] = os.path.getmtime(os.path.join(directory, name))
+
+    def make_key(self, year, month, lat, lon):
+        """Content address of a request: identical (source, year, month, grid cell, method) -> identical key."""
+        lat, lon = grid_coords(lat, lon)
+        raw = json.dumps({"source": self.source, "year": year, "month": month, "lat": lat, "lon": lon,
+                          "method": self.method}, sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, year, month, lat, lon, allow_expired=False):
+        """Returns the cached day list, or None on a miss / expired entry."""
+        key = self.make_key(year, month, lat, lon)
+        path = self.path_for(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            with self.lock:
+                self.misses += 1
+            return None
+
+        if not allow_expired and time.time() - entry.get('stored_at', 0) > entry.get('ttl', self.ttl_seconds):
+            with self.lock:
+                self.misses += 1
+            return None
+
+        now = time.time()
+        try:
+            os.utime(path, (now, now)) # Mark as recently used
+        except OSError:
+            pass
+        with self.lock:
+            self.index[key] = now
+            self.hits += 1
+        return entry.get('data', [])
+
+    def put(self, year, month, lat, lon, data, ttl_seconds=None):
+        """Stores a response (written to a temp file first so readers never see half an entry)."""
+        key = self.make_key(year, month, lat, lon)
+        path = self.path_for(key)
+        lat, lon = grid_coords(lat, lon)
+        entry = {
+            "request": {"source": self.source, "year": year, "month": month, "lat": lat, "lon": lon,
+                        "method": self.method},
+            "stored_at": time.time(),
+            "ttl": self.ttl_seconds if ttl_seconds is None else ttl_seconds,
+            "data": data,
+        }
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            self.index[key] = time.time()
+            self.evict()
+
+    def entries(self):
+        """Yields (request, data) for every readable entry from this source, e.g. to validate other backends against.
+
+        Entries from before the source was recorded are included.
+        """
+        for key in list(self.index):
+            try:
+                with open(self.path_for(key), 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if (entry.get('request') or {}).get('source', self.source) != self.source:
+                continue
+            yield entry.get('request'), entry.get('data', [])
+
+    def evict(self):
+        """Drops least recently used entries until the cache fits. Caller holds the lock."""
+        overflow = len(self.index) - self.max_entries
+        if overflow <= 0:
+            return
+        for key in sorted(self.index, key=self.index.get)[:overflow]:
+            del self.index[key]
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
@@ -0,0 +1,138 @@
+import os
+import re
+import sys
+import json
+import gzip
+import hashlib
+import argparse
+from datetime import date, timedelta
+
+# Per-city output for the web pages. Instead of one cities.json that every page has to
+# download in full, this writes a small index plus one tiny file per city:
+#
+#   schedules/index.json        {"version": 1, "format": "minutes", "cities": [
+#                                  {"name": "Lahore", "lat": 31.55, "lon": 74.35,
+#                                   "shard": "cities/Lahore-1a2b3c4d.json", "sha256": "...", "bytes": 290}, ...]}
+#   schedules/cities/<name>.json {"name": "Lahore", "start": "2026-02-19",
+#                                 "sehr": [325, 324, ...], "iftar": [1076, ...]}
+#
+# Times are minutes since midnight (325 = 05:25) for consecutive days from "start"; a
+# schedule with gaps also gets a "dates" list. With gzip on, every file also gets a
+# pre-compressed .gz twin for servers that can serve those directly.
+#
+#   python shard_output.py --out ../../Html/schedules --gzip
+
+SHARD_DIR = "schedules"
+INDEX_FILE = "index.json"
+SHARD_VERSION = 1
+
+def shard_name(city_name):
+    safe = re.sub(r'[^A-Za-z0-9_-]', '_', city_name)[:40]
+    return f"cities/{safe}-{hashlib.sha1(city_name.encode('utf-8')).hexdigest()[:8]}.json"
+
+def to_minutes(hhmm):
+    hours, minutes = hhmm.split(':')
+    return int(hours) * 60 + int(minutes)
+
+def pack_schedule(city_name, schedule):
+    """One city's schedule (list of day dicts from cities.json) in the compact shard layout."""
+    dates = [day["date"] for day in schedule]
+    packed = {
+        "name": city_name,
+        "start": dates[0] if dates else None,
+        "sehr": [to_minutes(day["sehr"]) for day in schedule],
+        "iftar": [to_minutes(day["iftar"]) for day in schedule],
+    }
+    if dates:
+        first = date.fromisoformat(dates[0])
+        if dates != [(first + timedelta(days=n)).isoformat() for n in range(len(dates))]:
+            packed["dates"] = dates
+    return packed
+
+def write_bytes_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def write_file(path, data, gzip_output):
+    write_bytes_atomic(path, data)
+    if gzip_output:
+        write_bytes_atomic(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+    elif os.path.exists(path + ".gz"):
+        os.remove(path + ".gz") # Don't leave a stale twin behind
+
+def load_index(directory):
+    try:
+        with open(os.path.join(directory, INDEX_FILE), "r", encoding="utf-8") as f:
+            return {entry["name"]: entry for entry in json.load(f).get("cities", [])}
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def write_sharded_output(schedules, coordinates=None, directory=SHARD_DIR, gzip_output=False):
+    """Writes the index and any shard whose content changed. Returns (shards written, unchanged).
+
+    `schedules` is the cities.json dict; `coordinates` maps city name -> (lat, lon).
+    Shards of cities listed in the previous index but gone from `schedules` are deleted.
+    """
+    coordinates = coordinates or {}
+    os.makedirs(os.path.join(directory, "cities"), exist_ok=True)
+    previous = load_index(directory)
+    entries, written, unchanged = [], 0, 0
+    for city_name, schedule in schedules.items():
+        data = json.dumps(pack_schedule(city_name, schedule), separators=(",", ":"),
+                          ensure_ascii=False).encode("utf-8")
+        checksum = hashlib.sha256(data).hexdigest()
+        shard = shard_name(city_name)
+        path = os.path.join(directory, shard)
+        old = previous.get(city_name)
+        if (old and old.get("sha256") == checksum and os.path.exists(path)
+                and os.path.exists(path + ".gz") == gzip_output):
+            unchanged += 1
+        else:
+            write_file(path, data, gzip_output)
+            written += 1
+        lat, lon = coordinates.get(city_name, (None, None))
+        entries.append({"name": city_name, "lat": lat, "lon": lon, "shard": shard,
+                        "sha256": checksum, "bytes": len(data)})
+
+    index = {"version": SHARD_VERSION, "format": "minutes", "cities": entries}
+    write_file(os.path.join(directory, INDEX_FILE),
+               json.dumps(index, separators=(",", ":"), ensure_ascii=False).encode("utf-8"), gzip_output)
+    remove_stale_shards(directory, previous, {entry["shard"] for entry in entries})
+    return written, unchanged
+
+def remove_stale_shards(directory, previous, current_shards):
+    """Deletes shards (and .gz twins) the old index listed that the new one no longer has."""
+    for entry in previous.values():
+        shard = entry.get("shard") or ""
+        if shard in current_shards or not shard.startswith("cities/") or ".." in shard:
+            continue # Still in use, or not a path this module wrote
+        for path in (os.path.join(directory, entry["shard"]), os.path.join(directory, entry["shard"]) + ".gz"):
+            if os.path.exists(path):
+                os.remove(path)
+
+def main():
+    # Imported here: autotime imports this module for its --shard-dir option
+    from autotime import JSON_FILE_PATH, INPUT_FILE_PATH, load_json_file, parse_input_lines
+
+    parser = argparse.ArgumentParser(description="Split cities.json into an index plus one compact file per city.")
+    parser.add_argument("--json", default=JSON_FILE_PATH, help=f"schedules to split (default {JSON_FILE_PATH})")
+    parser.add_argument("--input", default=INPUT_FILE_PATH, help=f"city coordinates (default {INPUT_FILE_PATH})")
+    parser.add_argument("--out", default=SHARD_DIR, help=f"output folder (default {SHARD_DIR})")
+    parser.add_argument("--gzip", action="store_true", help="also write pre-compressed .gz files")
+    args = parser.parse_args()
+
+    schedules = load_json_file(args.json)
+    if not schedules:
+        print(f"❌ No schedules found in '{args.json}'.")
+        sys.exit(1)
+    coordinates = {}
+    if os.path.exists(args.input):
+        with open(args.input, "r", encoding="utf-8") as f:
+            coordinates = {city[0]: (city[1], city[2]) for city in parse_input_lines(f)}
+    written, unchanged = write_sharded_output(schedules, coordinates, args.out, args.gzip)
+    print(f"✅ {len(schedules)} cities in {args.out}/{INDEX_FILE}: {written} shard(s) written, {unchanged} unchanged.")
+
+if __name__ == "__main__":
+    main()
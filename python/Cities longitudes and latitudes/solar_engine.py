@@ -0,0 +1,79 @@
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError: # The API backend works without NumPy; only the local engine needs it
+    np = None
+
+# Offline Fajr/Maghrib calculator using the same astronomy as the Aladhan API
+# (the PrayTimes.org algorithm), evaluated for a whole grid of cities x days at once.
+
+KARACHI_FAJR_ANGLE = 18.0    # University of Islamic Sciences, Karachi: Fajr at 18 deg below the horizon
+SUNSET_ANGLE = 0.833         # Sun's upper limb on the horizon, including refraction
+PAKISTAN_UTC_OFFSET = 5.0    # PKT, no daylight saving
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("The local solar engine needs NumPy (pip install numpy).")
+
+def julian_day(day):
+    """Julian day number at 00:00 UTC for a datetime.date / datetime."""
+    year, month = day.year, day.month
+    if month <= 2:
+        year -= 1
+        month += 12
+    a = year // 100
+    b = 2 - a + a // 4
+    return int(365.25 * (year + 4716)) + int(30.6001 * (month + 1)) + day.day + b - 1524.5
+
+def sun_position(jd):
+    """Returns (declination in degrees, equation of time in hours) for an array of Julian days."""
+    d = jd - 2451545.0
+    g = np.radians((357.529 + 0.98560028 * d) % 360)
+    q = (280.459 + 0.98564736 * d) % 360
+    l = np.radians((q + 1.915 * np.sin(g) + 0.020 * np.sin(2 * g)) % 360)
+    e = np.radians(23.439 - 0.00000036 * d)
+
+    ra = (np.degrees(np.arctan2(np.cos(e) * np.sin(l), np.cos(l))) / 15) % 24
+    eqt = q / 15 - ra
+    decl = np.degrees(np.arcsin(np.sin(e) * np.sin(l)))
+    return decl, eqt
+
+def sun_angle_time(angle, guess, jd, lat, ccw):
+    """Local solar time (hours) at which the sun is `angle` degrees below the horizon.
+
+    `guess` is the approximate time of day (hours) used to evaluate the sun's position;
+    ccw=True gives the morning event, False the evening one.
+    """
+    decl, eqt = sun_position(jd + guess / 24)
+    noon = (12 - eqt) % 24
+    lat_r, decl_r = np.radians(lat), np.radians(decl)
+    cos_t = (-np.sin(np.radians(angle)) - np.sin(decl_r) * np.sin(lat_r)) / (np.cos(decl_r) * np.cos(lat_r))
+    t = np.degrees(np.arccos(np.clip(cos_t, -1.0, 1.0))) / 15
+    return noon - t if ccw else noon + t
+
+def prayer_minutes(lats, lons, days, utc_offset=PAKISTAN_UTC_OFFSET, fajr_angle=KARACHI_FAJR_ANGLE):
+    """Computes Fajr and Maghrib for every city x day in one vectorised pass.
+
+    lats/lons are sequences of length C, days a sequence of D dates. Returns two integer
+    arrays of shape (C, D) holding minutes since local midnight, rounded to the nearest
+    minute like the API does.
+    """
+    require_numpy()
+    lats = np.asarray(lats, dtype=float)[:, None]
+    lons = np.asarray(lons, dtype=float)[:, None]
+    jd = np.array([julian_day(d) for d in days], dtype=float)[None, :] - lons / (15 * 24)
+
+    fajr = sun_angle_time(fajr_angle, 5.0, jd, lats, ccw=True)
+    sunset = sun_angle_time(SUNSET_ANGLE, 18.0, jd, lats, ccw=False)
+
+    # Solar time -> local clock time
+    shift = utc_offset - lons / 15
+    fajr_minutes = np.floor((fajr + shift) * 60 + 0.5).astype(int) % 1440
+    maghrib_minutes = np.floor((sunset + shift) * 60 + 0.5).astype(int) % 1440
+    return fajr_minutes, maghrib_minutes
+
+if __name__ == "__main__":
+    fajr, maghrib = prayer_minutes([33.6844], [73.0479], [date(2026, 2, 19)])
+    print(f"Islamabad 2026-02-19: Fajr {fajr[0, 0] // 60:02d}:{fajr[0, 0] % 60:02d}, "
+          f"Maghrib {maghrib[0, 0] // 60:02d}:{maghrib[0, 0] % 60:02d}")
@@ -0,0 +1,147 @@
+import json
+import gzip
+import time
+import random
+import calendar
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# A tiny local stand-in for the Aladhan calendar endpoint, so autotime.py can be
+# exercised without network access:
+#   python stub_server.py --port 8080
+#   python autotime.py --api-url http://127.0.0.1:8080
+#
+# It can also misbehave like a busy real server, to exercise the client's retries:
+#   python stub_server.py --latency 0.2 --throttle-rate 0.1 --drop-rate 0.05 --seed 1
+# (--throttle-rate answers that share of requests with 429 + Retry-After, --drop-rate
+# closes that share of connections without answering). Connections are kept alive and
+# responses are gzipped for clients that ask.
+
+def fake_time(base_minutes):
+    """Formats minutes-since-midnight the way the API does, e.g. '05:25 (PKT)'."""
+    base_minutes %= 24 * 60
+    return f"{base_minutes // 60:02d}:{base_minutes % 60:02d} (PKT)"
+
+def build_calendar(year, month, lat, lon):
+    """Builds a deterministic month of fake timings that drift a little each day."""
+    days = []
+    shift = int(round((lat - 30) * 2 - (lon - 70) * 4))
+    for day in range(1, calendar.monthrange(year, month)[1] + 1):
+        days.append({
+            "timings": {
+                "Fajr": fake_time(5 * 60 + 20 + shift - day // 2),
+                "Maghrib": fake_time(18 * 60 + shift + day // 2),
+            },
+            "date": {
+                "gregorian": {"date": f"{day:02d}-{month:02d}-{year}"},
+            },
+        })
+    return days
+
+class CalendarHandler(BaseHTTPRequestHandler):
+    """Serves GET /v1/calendar/<year>/<month>?latitude=..&longitude=.."""
+
+    protocol_version = "HTTP/1.1" # Keep-alive: one connection can carry many requests
+    disable_nagle_algorithm = True # Headers and body go out in separate writes; don't stall the body ~40ms
+
+    def setup(self):
+        super().setup()
+        self.server.count("connection_count")
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        parts = parsed.path.strip('/').split('/')
+        query = parse_qs(parsed.query)
+        try:
+            if parts[:2] != ['v1', 'calendar'] or len(parts) != 4:
+                raise ValueError("unknown endpoint")
+            year, month = int(parts[2]), int(parts[3])
+            lat = float(query['latitude'][0])
+            lon = float(query['longitude'][0])
+        except (ValueError, KeyError, IndexError):
+            self.send_json(400, {"code": 400, "status": "Bad Request", "data": []})
+            return
+
+        self.server.count("request_count")
+        faults = self.server.faults
+        if faults["latency"]:
+            time.sleep(faults["latency"] * faults["rng"].uniform(0.5, 1.5))
+        roll = faults["rng"].random()
+        if roll < faults["drop_rate"]:
+            self.server.count("dropped_count")
+            self.close_connection = True # Hang up without a response
+            return
+        if roll < faults["drop_rate"] + faults["throttle_rate"]:
+            self.server.count("throttled_count")
+            self.send_json(429, {"code": 429, "status": "Too Many Requests", "data": []},
+                           {"Retry-After": str(faults["retry_after"])})
+            return
+        self.send_json(200, {"code": 200, "status": "OK", "data": build_calendar(year, month, lat, lon)})
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        gzipped = "gzip" in self.headers.get('Accept-Encoding', '')
+        if gzipped:
+            body = gzip.compress(body)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Keep test output quiet
+
+class StubServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer plus request/connection counters and the fault settings."""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, throttle_rate=0.0, drop_rate=0.0, retry_after=1, seed=None):
+        super().__init__(address, CalendarHandler)
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.connection_count = 0
+        self.throttled_count = 0
+        self.dropped_count = 0
+        self.faults = {"latency": latency, "throttle_rate": throttle_rate, "drop_rate": drop_rate,
+                       "retry_after": retry_after, "rng": random.Random(seed)}
+
+    def count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+def start_stub_server(host="127.0.0.1", port=0, **faults):
+    """Starts the stub on a background thread and returns (server, base_url).
+
+    `faults` are StubServer's latency / throttle_rate / drop_rate / retry_after / seed.
+    """
+    server = StubServer((host, port), **faults)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of the Aladhan calendar API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="average seconds added to each response")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="share of connections closed without an answer")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with each 429")
+    parser.add_argument("--seed", type=int, help="random seed, for repeatable faults")
+    args = parser.parse_args()
+
+    server = StubServer((args.host, args.port), args.latency, args.throttle_rate, args.drop_rate,
+                        args.retry_after, args.seed)
+    print(f"Stub calendar API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,68 @@
+import sys
+import argparse
+from datetime import datetime
+
+import solar_engine
+from autotime import CACHE_DIR, to_minutes, MINUTES_PER_DAY
+from response_cache import ResponseCache
+
+# Checks the offline solar engine against real API responses already sitting in the
+# response cache (fill it with a normal autotime.py run first):
+#   python validate_solar.py --tolerance 1
+
+def entry_location(request, data):
+    """Coordinates of a cache entry; older entries only have them in the API's own 'meta' block."""
+    if request:
+        return request['lat'], request['lon']
+    meta = data[0].get('meta', {}) if data else {}
+    if 'latitude' in meta and 'longitude' in meta:
+        return float(meta['latitude']), float(meta['longitude'])
+    return None
+
+def minute_difference(a, b):
+    """Smallest signed difference between two minutes-since-midnight values."""
+    return (a - b + MINUTES_PER_DAY // 2) % MINUTES_PER_DAY - MINUTES_PER_DAY // 2
+
+def validate(cache, tolerance=1, utc_offset=solar_engine.PAKISTAN_UTC_OFFSET):
+    """Compares every cached day against the local engine. Returns (days checked, list of mismatches)."""
+    checked = 0
+    mismatches = []
+    for request, data in cache.entries():
+        location = entry_location(request, data)
+        if location is None or not data:
+            continue
+        lat, lon = location
+
+        days = [datetime.strptime(d['date']['gregorian']['date'], "%d-%m-%Y").date() for d in data]
+        fajr, maghrib = solar_engine.prayer_minutes([lat], [lon], days, utc_offset=utc_offset)
+
+        for col, (day, day_info) in enumerate(zip(days, data)):
+            checked += 1
+            for name, local in (("Fajr", fajr[0, col]), ("Maghrib", maghrib[0, col])):
+                diff = minute_difference(int(local), to_minutes(day_info['timings'][name]))
+                if abs(diff) > tolerance:
+                    mismatches.append((lat, lon, day.isoformat(), name, diff))
+    return checked, mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate solar_engine.py against cached Aladhan responses.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--tolerance", type=int, default=1, help="allowed difference in minutes (default 1)")
+    parser.add_argument("--utc-offset", type=float, default=solar_engine.PAKISTAN_UTC_OFFSET)
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.cache_dir)
+    checked, mismatches = validate(cache, args.tolerance, args.utc_offset)
+    if not checked:
+        print(f"❌ No usable cached responses in '{args.cache_dir}'. Run autotime.py with the API backend first.")
+        sys.exit(1)
+
+    for lat, lon, day, name, diff in mismatches[:20]:
+        print(f"  [!] ({lat}, {lon}) {day} {name}: local engine is {diff:+d} min off")
+    if mismatches:
+        print(f"❌ {len(mismatches)} time(s) outside ±{args.tolerance} min across {checked} days.")
+        sys.exit(1)
+    print(f"✅ All {checked} cached days match the local engine within ±{args.tolerance} min.")
+
+if __name__ == "__main__":
+    main()